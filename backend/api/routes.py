@@ -4,12 +4,20 @@ print("Current file path:", __file__)
 print("Current directory:", os.path.dirname(__file__))
 print("Python path:", sys.path)
 
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, send_file, current_app, stream_with_context
 from werkzeug.utils import secure_filename
 import traceback
+import uuid
+import json
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from utils.logger import logger
-from core.audio import AudioProcessor
+from core.audio import AudioProcessor, pcm_bytes, probe_duration
 from core.transcription import Transcriber
+from core.jobs import QueueFullError
+from core.progress import ProgressTracker, ProgressAggregator, FINISHED_STATUSES
+from core.pipeline import prefetch, MemoryBudget
+from core.options import default_options, parse_options
 import time
 
 print("Routes module is being imported!")
@@ -17,11 +25,50 @@ print("Routes module is being imported!")
 
 api = Blueprint('api', __name__)
 
+def queue_job(source_type, handler, *args, options=None):
+    """Queue a handler as a background job with its own progress tracker"""
+    job_id = uuid.uuid4().hex
+    progress_tracker = current_app.progress_registry.create(job_id)
+    try:
+        return current_app.job_queue.submit(
+            source_type, handler, *args, progress_tracker, options,
+            job_id=job_id, progress_tracker=progress_tracker
+        )
+    except QueueFullError as e:
+        progress_tracker.update(f"Error: {str(e)}", status='error')
+        raise
+
+def preview_recorder(progress_tracker):
+    """Return a callback factory that stores preview transcripts on the running job.
+
+    Called in the handler's own thread (which has the app context);
+    the callbacks it makes can then be used from any worker thread.
+    """
+    job = current_app.job_queue.get(progress_tracker.job_id)
+
+    def for_item(index, title):
+        if job is None:
+            return None
+        return lambda preview: job.set_preview(index, title, preview)
+
+    return for_item
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
-def handle_file_uploads():
+def handle_file_uploads(files, progress_tracker, options=None):
+    """Transcribe uploaded files.
+
+    `files` is a list of dicts with 'filename', 'content_type', 'path' and
+    'size', spooled to TEMP_FOLDER before the job was queued; this handler
+    owns deleting them. Files are processed on up to UPLOAD_WORKERS threads,
+    with UPLOAD_MEMORY_BUDGET bounding the decoded audio (estimated from each
+    file's duration) being worked on at once; results keep upload order.
+    Decoding, hashing and archiving overlap across workers, but each
+    transcription holds a model lease, so transcription itself only runs
+    side by side up to MODEL_POOL_REPLICAS files at a time.
+    """
     USE_FIREBASE = current_app.config['USE_FIREBASE']
     TEMP_FOLDER = current_app.config['TEMP_FOLDER']
     FIREBASE_AUDIO_FOLDER = current_app.config['FIREBASE_AUDIO_FOLDER']
@@ -30,143 +77,156 @@ def handle_file_uploads():
 
     # Ensure temp folder exists
     os.makedirs(TEMP_FOLDER, exist_ok=True)
+    record_preview = preview_recorder(progress_tracker)
 
+    app = current_app._get_current_object()
     storage = current_app.storage
-    transcriber = Transcriber(current_app.config, current_app.progress_tracker)
-    progress_tracker = current_app.progress_tracker
+    uploader = current_app.uploader
 
-    temp_files = []
+    temp_files = [file['path'] for file in files]
     try:
-        if 'files[]' not in request.files:
-            logger.error("No files[] in request.files")
-            logger.error(f"Request files: {request.files}")
-            return jsonify({'error': 'No files selected'}), 400
-        
-        files = request.files.getlist('files[]')
         logger.info(f"Received {len(files)} files")
 
-        if not files or all(file.filename == '' for file in files):
+        if not files or all(file['filename'] == '' for file in files):
             logger.error("No files detected or empty filenames")
-            return jsonify({'error': 'No files detected'}), 400 
+            return {'error': 'No files detected'}, 400
 
-        all_transcripts = []
-        skipped_files = []
         total_files = len(files)
-        processed_count = 0
-
-        for idx, file in enumerate(files, 1):
-            logger.info(f"===== Processing file {idx}/{total_files} =====")
-            logger.info(f"Filename: {file.filename}")
-            logger.info(f"Content type: {file.content_type}")
-           
-            if not allowed_file(file.filename):
-                logger.error(f"File type not allowed: {file.filename}")
-                skipped_files.append({
-                    'name': file.filename,
-                    'reason': 'Unsupported file type'
-                })
-                continue
+        aggregator = ProgressAggregator(progress_tracker, total_files)
+        budget = MemoryBudget(current_app.config['UPLOAD_MEMORY_BUDGET'])
+
+        def process_file(idx, file, batched=None):
+            part = aggregator.part(idx - 1, f"File {idx}/{total_files}: ")
+            # Charge the decoded PCM, not the compressed upload; a file whose
+            # duration can't be read takes the whole budget and runs alone
+            duration = probe_duration(file['path'])
+            footprint = pcm_bytes(duration) if duration else budget.limit
+            # Workers run outside the request, so give each its own app context
+            with app.app_context(), budget.reserve(footprint):
+                progress_tracker.check_cancelled()
+
+                logger.info(f"===== Processing file {idx}/{total_files} =====")
+                logger.info(f"Filename: {file['filename']}")
+                logger.info(f"Content type: {file['content_type']}")
+                part.update(f"Processing {file['filename']}", 0)
+
+                # The spooled name already carries a prefix that keeps same-named uploads apart
+                filename = secure_filename(file['filename'])
+                stored_name = os.path.basename(file['path'])
+                logger.info(f"Secured filename: {filename}")
+                logger.info(f"Spooled upload at {file['path']}, size: {file['size']} bytes")
 
-            try:
-                progress_tracker.update(
-                    f"Processing file {idx}/{total_files}: {file.filename}", 
-                    (processed_count * 100) // total_files
-                )
+                if USE_FIREBASE:
+                    # Archive to Firebase in the background while we transcribe the local copy
+                    logger.info(f"Archiving to Firebase audio folder: {FIREBASE_AUDIO_FOLDER}")
+                    uploader.upload(file['path'], FIREBASE_AUDIO_FOLDER, stored_name)
 
-                # Save uploaded file
-                filename = secure_filename(file.filename)
-                logger.info(f"Secured filename: {filename}")
+                # Transcribe the spooled upload in place
+                process_path = file['path']
+
+                # Transcribe, unless the batch pass already did
+                if batched:
+                    transcript_file, text = batched['transcript_file'], batched['text']
+                    cached, vad = batched['cached'], batched['vad']
+                else:
+                    logger.info(f"Starting transcription for: {process_path}")
+                    transcriber = Transcriber(app.config, part, options)
+                    transcript_file, text = transcriber.transcribe_audio(
+                        process_path,
+                        f"Uploaded file: {filename}",
+                        on_preview=record_preview(idx - 1, filename)
+                    )
+                    cached, vad = transcriber.cache_hit, transcriber.vad_stats
                
-                file_content = file.read()
-                logger.info(f"File content read, size: {len(file_content)} bytes")
+                if not transcript_file:
+                    raise Exception("Transcription failed - no transcript file produced")
 
-                if USE_FIREBASE:
-                    # Save to Firebase
-                    logger.info(f"Saving to Firebase audio folder: {FIREBASE_AUDIO_FOLDER}")
-                    stored_audio_path = storage.save_file(
-                        file_content,
-                        FIREBASE_AUDIO_FOLDER,
-                        filename
+                logger.info(f"Transcription completed successfully")
+                logger.info(f"Reading transcript from: {transcript_file}")
+                
+                with open(transcript_file, 'r', encoding='utf-8') as f:
+                    transcript_content = f.read()
+
+                transcript_filename = os.path.basename(transcript_file)
+                logger.info(f"Transcript filename: {transcript_filename}")
+
+                # Save the transcript
+                if USE_FIREBASE: 
+                    logger.info(f"Saving transcript to Firebase folder: {FIREBASE_TRANSCRIPT_FOLDER}")
+                    stored_transcript_path = storage.save_file(
+                        transcript_content,
+                        FIREBASE_TRANSCRIPT_FOLDER,
+                        transcript_filename
                     )
-                    logger.info(f"File saved to Firebase, URL: {stored_audio_path}")
-                    
-                    # Download for processing using correct path format
-                    firebase_path = f"{FIREBASE_AUDIO_FOLDER}/{filename}"
-                    temp_path = os.path.join(TEMP_FOLDER, filename)
-                    logger.info(f"Downloading from Firebase path: {firebase_path} to temp path: {temp_path}")
-                    
-                    success = storage.download_file(firebase_path, temp_path)
-                    if not success:
-                        raise Exception(f"Failed to download from Firebase path: {firebase_path}")
-                    
-                    process_path = temp_path
-                    temp_files.append(temp_path)
+                    logger.info(f"Transcript saved to Firebase: {stored_transcript_path}")
                 else:
-                    # Local storage
-                    process_path = os.path.join(TEMP_FOLDER, filename)
-                    with open(process_path, 'wb') as f:
-                        f.write(file_content)
-                    temp_files.append(process_path)
-
-                # Transcribe
-                logger.info(f"Starting transcription for: {process_path}")
-                transcript_file, text = transcriber.transcribe_audio(
-                    process_path,
-                    f"Uploaded file: {filename}"
-                )
-               
-                if transcript_file:
-                    logger.info(f"Transcription completed successfully")
-                    logger.info(f"Reading transcript from: {transcript_file}")
-                    
-                    with open(transcript_file, 'r', encoding='utf-8') as f:
-                        transcript_content = f.read()
-
-                    transcript_filename = os.path.basename(transcript_file)
-                    logger.info(f"Transcript filename: {transcript_filename}")
-
-                    # Save the transcript
-                    if USE_FIREBASE: 
-                        logger.info(f"Saving transcript to Firebase folder: {FIREBASE_TRANSCRIPT_FOLDER}")
-                        stored_transcript_path = storage.save_file(
-                            transcript_content,
-                            FIREBASE_TRANSCRIPT_FOLDER,
-                            transcript_filename
-                        )
-                        logger.info(f"Transcript saved to Firebase: {stored_transcript_path}")
-                    else:
-                        stored_transcript_path = os.path.join(TRANSCRIPTS_FOLDER, transcript_filename)
-                        logger.info(f"Saving transcript locally to: {stored_transcript_path}")
-                        with open(stored_transcript_path, 'w', encoding='utf-8') as f:
-                            f.write(transcript_content)
-                   
-                    # Add to successful transcripts
-                    all_transcripts.append({
-                        'title': filename,
-                        'text': text,
-                        'path': stored_transcript_path,
-                        'filename': transcript_filename
+                    stored_transcript_path = os.path.join(TRANSCRIPTS_FOLDER, transcript_filename)
+                    logger.info(f"Saving transcript locally to: {stored_transcript_path}")
+                    with open(stored_transcript_path, 'w', encoding='utf-8') as f:
+                        f.write(transcript_content)
+
+                logger.info(f"Successfully processed file {idx}/{total_files}")
+                return {
+                    'title': filename,
+                    'text': text,
+                    'path': stored_transcript_path,
+                    'filename': transcript_filename,
+                    'cached': cached,
+                    'vad': vad
+                }
+
+        # Short files share batched encoder/decoder passes first (see Transcriber.transcribe_batch);
+        # process_file transcribes whatever the batch leaves, one file at a time. The batch
+        # makes no preview pass, so jobs that asked for previews skip it.
+        batched = {}
+        allowed = [(idx, file) for idx, file in enumerate(files, 1) if allowed_file(file['filename'])]
+        wants_preview = options and options.get('preview')
+        if len(allowed) > 1 and not wants_preview and not progress_tracker.cancelled:
+            entries = Transcriber(current_app.config, progress_tracker, options).transcribe_batch(
+                [file['path'] for _, file in allowed],
+                [f"Uploaded file: {secure_filename(file['filename'])}" for _, file in allowed],
+                budget=budget
+            )
+            batched = {idx: entry for (idx, _), entry in zip(allowed, entries) if entry}
+            logger.info(f"Batch pass transcribed {len(batched)}/{len(allowed)} files")
+
+        all_transcripts = []
+        skipped_files = []
+        futures = []
+
+        with ThreadPoolExecutor(max_workers=current_app.config['UPLOAD_WORKERS'], thread_name_prefix='upload') as executor:
+            for idx, file in enumerate(files, 1):
+                if not allowed_file(file['filename']):
+                    logger.error(f"File type not allowed: {file['filename']}")
+                    aggregator.complete(idx - 1)
+                    futures.append((file, None))
+                    continue
+                futures.append((file, executor.submit(process_file, idx, file, batched.get(idx))))
+
+            # Collect in upload order, whatever order the workers finish in
+            for idx, (file, future) in enumerate(futures, 1):
+                if future is None:
+                    skipped_files.append({
+                        'name': file['filename'],
+                        'reason': 'Unsupported file type'
                     })
-                   
-                    # Increment counter
-                    processed_count += 1
-                    logger.info(f"Successfully processed file {idx}/{total_files}")
-                else:
-                    raise Exception("Transcription failed - no transcript file produced")
+                    continue
 
-            except Exception as e:
-                logger.error(f"Error processing file {file.filename}: {str(e)}")
-                logger.error(traceback.format_exc())
-                skipped_files.append({
-                    'name': file.filename,
-                    'reason': str(e)
-                })
-                continue
+                try:
+                    all_transcripts.append(future.result())
+                except Exception as e:
+                    logger.error(f"Error processing file {file['filename']}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    skipped_files.append({
+                        'name': file['filename'],
+                        'reason': str(e)
+                    })
+                finally:
+                    aggregator.complete(idx - 1)
 
         if not all_transcripts:
             logger.error(f"No files were successfully transcribed")
-            logger.error(f"Processed count: {processed_count}")
-            logger.error(f"Files attempted: {[f.filename for f in files]}")
+            logger.error(f"Files attempted: {[f['filename'] for f in files]}")
             message = "No files were successfully transcribed"
             if skipped_files:
                 message += f". {len(skipped_files)} files were skipped."
@@ -176,12 +236,10 @@ def handle_file_uploads():
 
         progress_tracker.update(
             message="Processing complete!",
-            progress=100
+            progress=100,
+            status='complete'
         )
 
-        # Set completion status
-        progress_tracker.current_progress['status'] = 'complete'
-
         response_data = {
             'status': 'success',
             'message': 'Processing complete',
@@ -192,34 +250,47 @@ def handle_file_uploads():
             response_data['skipped_files'] = skipped_files
 
         logger.info(f"Returning response with {len(all_transcripts)} transcripts")
-        return jsonify(response_data)
+        return response_data, 200
+
+    except Exception as e:
+        logger.error(f"Error in handle_file_uploads: {str(e)}")
+        logger.error(traceback.format_exc())
+        progress_tracker.update(
+            message=f"Error: {str(e)}",
+            status='error'
+        )
+        return {'error': str(e)}, 500
    
     finally:
+        # Files still being archived are deleted once their upload finishes
         logger.info("Cleaning up temporary files")
         for temp_file in temp_files:
-            try:
-                if temp_file and os.path.exists(temp_file):
-                    logger.info(f"Deleting temp file: {temp_file}")
-                    os.remove(temp_file)
-            except Exception as e:
-                logger.error(f"Error deleting temp file {temp_file}: {e}")
+            uploader.remove(temp_file)
 
-def handle_single_video(source_url):
+def handle_single_video(source_url, progress_tracker, options=None):
     """Handle single video URL processing"""
     audio_file = None
     transcript_file = None
     stored_transcript_path = None
-    progress_tracker = current_app.progress_tracker
+
+    USE_FIREBASE = current_app.config['USE_FIREBASE']
+    TEMP_FOLDER = current_app.config['TEMP_FOLDER']
+    FIREBASE_AUDIO_FOLDER = current_app.config['FIREBASE_AUDIO_FOLDER']
+    FIREBASE_TRANSCRIPT_FOLDER = current_app.config['FIREBASE_TRANSCRIPT_FOLDER']
+    TRANSCRIPTS_FOLDER = current_app.config['TRANSCRIPTS_FOLDER']
+    options = options or default_options(current_app.config)
 
     try: 
         logger.info(f"Processing URL: {source_url}")
 
         if not source_url:
-            return jsonify({'error': 'No URL provided' }), 400
+            return {'error': 'No URL provided'}, 400
         
-        #Download using audio processor
-        audio_processor = AudioProcessor(current_app.config, current_app.progress_tracker)
-        audio_file, title = audio_processor.download_audio(source_url)
+        #Download using audio processor; with a time range only that section is fetched
+        audio_processor = AudioProcessor(current_app.config, progress_tracker)
+        audio_file, title = audio_processor.download_audio(
+            source_url, options['start_time'], options['end_time']
+        )
         logger.info(f"Download completed - Audio file: {audio_file}, Title: {title}")
         
         if not audio_file:
@@ -227,29 +298,21 @@ def handle_single_video(source_url):
 
         logger.info(f"Audio file exists at: {audio_file}")
 
-         # Save audio file to storage
-        USE_FIREBASE = current_app.config['USE_FIREBASE']
-        TEMP_FOLDER = current_app.config['TEMP_FOLDER']
-        FIREBASE_AUDIO_FOLDER = current_app.config['FIREBASE_AUDIO_FOLDER']
-        FIREBASE_TRANSCRIPT_FOLDER = current_app.config['FIREBASE_TRANSCRIPT_FOLDER']
-        TRANSCRIPTS_FOLDER = current_app.config['TRANSCRIPTS_FOLDER']
-        
-        with open(audio_file, 'rb') as f:
-            audio_content = f.read()
-
+         # Archive audio file to storage in the background; we transcribe the local copy
         audio_filename = os.path.basename(audio_file)
-        stored_audio_path = current_app.storage.save_file(
-            audio_content, 
+        current_app.uploader.upload(
+            audio_file, 
             FIREBASE_AUDIO_FOLDER if USE_FIREBASE else TEMP_FOLDER,
             audio_filename
         )
-        logger.info(f"Audio saved to storage at: {stored_audio_path}")
         
         # Transcribe using Transcriber
-        transcriber = Transcriber(current_app.config, progress_tracker)
+        transcriber = Transcriber(current_app.config, progress_tracker, options)
         transcript_file, text = transcriber.transcribe_audio(
             audio_file,
-            f"Video: {title}\nURL: {source_url}"
+            f"Video: {title}\nURL: {source_url}",
+            on_preview=preview_recorder(progress_tracker)(0, title),
+            clipped=True
         )
         
         if not transcript_file:
@@ -291,10 +354,12 @@ def handle_single_video(source_url):
             'message': 'Processing complete',
             'transcript': text,
             'filename': transcript_filename,
-            'transcript_path': stored_transcript_path
+            'transcript_path': stored_transcript_path,
+            'cached': transcriber.cache_hit,
+            'vad': transcriber.vad_stats
         }
         logger.info(f"Sending response with transcript path: {stored_transcript_path}")
-        return jsonify(response)
+        return response, 200
 
     except Exception as e:
         logger.error(f"Error in handle_single_video: {str(e)}")
@@ -303,7 +368,7 @@ def handle_single_video(source_url):
             message=f"Error: {str(e)}",
             status='error'
         )
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
     finally:
         # Add a small delay to ensure files are not in use
@@ -313,10 +378,7 @@ def handle_single_video(source_url):
         if audio_file and os.path.exists(audio_file):
             logger.info(f"Cleaning up audio file: {audio_file}")
             if audio_file.startswith(TEMP_FOLDER):
-                try:
-                    current_app.storage.delete_file(audio_file)
-                except Exception as e:
-                    logger.error(f"Error deleting audio file: {e}")
+                current_app.uploader.remove(audio_file)
         
         # In development mode, only clean up temporary transcript files
         if not USE_FIREBASE:
@@ -336,16 +398,15 @@ def handle_single_video(source_url):
                 except Exception as e:
                     logger.error(f"Error deleting transcript file: {e}")
 
-def handle_playlist(source_url): 
+def handle_playlist(source_url, progress_tracker, options=None):
     """Handle YouTube playlist transcription."""
     temp_files = []
-    progress_tracker = current_app.progress_tracker
     
     try:
         logger.info(f"Processing playlist URL: {source_url}")
         
         if not source_url:
-            return jsonify({'error': 'No URL provided'}), 400
+            return {'error': 'No URL provided'}, 400
 
         # Get config values
         USE_FIREBASE = current_app.config['USE_FIREBASE']
@@ -354,50 +415,107 @@ def handle_playlist(source_url):
         FIREBASE_TRANSCRIPT_FOLDER = current_app.config['FIREBASE_TRANSCRIPT_FOLDER']
         TRANSCRIPTS_FOLDER = current_app.config['TRANSCRIPTS_FOLDER']
         
-        # Initialize processors
-        audio_processor = AudioProcessor(current_app.config, progress_tracker)
-        transcriber = Transcriber(current_app.config, progress_tracker)
+        config = current_app.config
+        options = options or default_options(config)
+        audio_processor = AudioProcessor(config, progress_tracker)
         
-        # Get videos from playlist using passed source_url
-        videos = audio_processor.get_playlist_videos(source_url)
-        if not videos:
-            return jsonify({'error': 'No videos found in playlist'}), 400
+        # Videos come in as yt-dlp pages through the playlist, so the first
+        # downloads start while the rest of a long playlist is still being listed
+        videos = audio_processor.iter_playlist_videos(
+            source_url,
+            start=options['playlist_start'],
+            end=options['playlist_end'],
+            max_items=options['max_items']
+        )
+        first_video = next(videos, None)
+        if first_video is None:
+            return {'error': 'No videos found in playlist'}, 400
+
+        total = audio_processor.playlist_count
+        if total:
+            progress_tracker.update(f"Found {total} videos in playlist", 10)
+        else:
+            progress_tracker.update("Processing playlist videos as they are found", 10)
+
+        # Each video gets an equal share of the remaining 10-100%; its download
+        # fills the first 30% of that share and transcription the rest. With no
+        # count up front, the shares shrink as more videos turn up.
+        aggregator = ProgressAggregator(progress_tracker, total or 1, start=10, end=100)
+
+        def label(idx):
+            return f"Video {idx}/{total}: " if total else f"Video {idx}: "
+
+        def indexed_videos():
+            for idx, video_info in enumerate(itertools.chain([first_video], videos), 1):
+                aggregator.grow(idx)
+                yield idx, video_info
+
+        def download(indexed_video):
+            idx, video_info = indexed_video
+            part = aggregator.part(idx - 1, label(idx), scale=(0, 30))
+            return AudioProcessor(config, part).download_audio(
+                video_info['url'], options['start_time'], options['end_time']
+            )
 
-        progress_tracker.update(f"Found {len(videos)} videos in playlist", 10)
+        def discard(download_result):
+            audio_file, _ = download_result
+            if audio_file and os.path.exists(audio_file):
+                os.remove(audio_file)
+
+        # Downloads run ahead on an I/O pool while this thread transcribes
+        record_preview = preview_recorder(progress_tracker)
+        downloads = prefetch(
+            indexed_videos(),
+            download,
+            workers=config['PLAYLIST_DOWNLOAD_WORKERS'],
+            ahead=config['PLAYLIST_PREFETCH'],
+            discard=discard
+        )
         
         all_transcripts = []
         skipped_videos = []
         
-        for idx, video_info in enumerate(videos, 1):
+        for (idx, video_info), download_result, download_error in downloads:
             audio_file = None
             transcript_file = None
+
+            if progress_tracker.cancelled:
+                logger.info("Job was cancelled, skipping remaining videos")
+                if download_result and download_result[0]:
+                    temp_files.append(download_result[0])
+                downloads.close()
+                break
             
             try:
-                progress_tracker.update(f"Processing video {idx}/{len(videos)}: {video_info['title']}")
-                
-                # Download audio using AudioProcessor
-                audio_file, title = audio_processor.download_audio(video_info['url'])
+                part = aggregator.part(idx - 1, label(idx))
+                part.update(f"Processing {video_info['title']}")
+
+                if download_error:
+                    raise download_error
+                audio_file, title = download_result
                 logger.info(f"Downloaded audio for video {idx}: {title}")
                 
                 if not audio_file:
                     raise Exception("Audio download failed")
 
-                # Save audio file to storage
-                with open(audio_file, 'rb') as f:
-                    audio_content = f.read()
-                    
+                # Track temp files for cleanup, even if this video fails later
+                temp_files.append(audio_file)
+
+                # Archive audio file to storage in the background; we transcribe the local copy
                 audio_filename = os.path.basename(audio_file)
-                stored_audio_path = current_app.storage.save_file(
-                    audio_content,
+                current_app.uploader.upload(
+                    audio_file,
                     FIREBASE_AUDIO_FOLDER if USE_FIREBASE else TEMP_FOLDER,
                     audio_filename
                 )
-                logger.info(f"Audio saved to storage at: {stored_audio_path}")
 
                 # Transcribe using Transcriber
+                transcriber = Transcriber(config, part, options)
                 transcript_file, text = transcriber.transcribe_audio(
                     audio_file,
-                    f"Video {idx}: {title}\nURL: {video_info['url']}"
+                    f"Video {idx}: {title}\nURL: {video_info['url']}",
+                    on_preview=record_preview(idx - 1, title),
+                    clipped=True
                 )
                 
                 if not transcript_file:
@@ -428,17 +546,18 @@ def handle_playlist(source_url):
                     'title': title,
                     'text': text,
                     'path': stored_transcript_path,
-                    'filename': transcript_filename
+                    'filename': transcript_filename,
+                    'cached': transcriber.cache_hit,
+                    'vad': transcriber.vad_stats
                 })
+                aggregator.complete(idx - 1)
                 
-                # Track temp files for cleanup
-                if audio_file:
-                    temp_files.append(audio_file)
                 if transcript_file and transcript_file.startswith(TEMP_FOLDER):
                     temp_files.append(transcript_file)
 
             except Exception as e:
                 logger.error(f"Error processing video {idx}: {e}")
+                aggregator.complete(idx - 1)
                 skipped_videos.append({
                     'url': video_info['url'],
                     'title': video_info['title'],
@@ -468,7 +587,7 @@ def handle_playlist(source_url):
         if skipped_videos:
             response_data['skipped_videos'] = skipped_videos
 
-        return jsonify(response_data)
+        return response_data, 200
 
     except Exception as e:
         logger.error(f"Error in handle_playlist: {str(e)}")
@@ -477,7 +596,7 @@ def handle_playlist(source_url):
             message=f"Error: {str(e)}",
             status='error'
         )
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
     finally:
         # Add a small delay to ensure files are not in use
@@ -486,17 +605,31 @@ def handle_playlist(source_url):
         # Clean up temp files
         for temp_file in temp_files:
             if temp_file and os.path.exists(temp_file):
-                try:
-                    if temp_file.startswith(TEMP_FOLDER):
-                        logger.info(f"Cleaning up temp file: {temp_file}")
-                        current_app.storage.delete_file(temp_file)
-                except Exception as e:
-                    logger.error(f"Error deleting temp file {temp_file}: {e}")
+                if temp_file.startswith(TEMP_FOLDER):
+                    current_app.uploader.remove(temp_file)
 
 @api.route('/health')
 def health_check():
     return jsonify({'status': 'healthy'}), 200
 
+@api.route('/models')
+def model_pool_stats():
+    """Report loaded Whisper models and pool hit/miss counters"""
+    return jsonify(current_app.model_pool.stats())
+
+@api.route('/proxies')
+def proxy_stats():
+    """Report each download proxy's latency, failure count and circuit state"""
+    return jsonify({'proxies': current_app.proxy_manager.stats()})
+
+@api.route('/cache')
+def cache_stats():
+    """Report transcript and download cache sizes and hit/miss counters"""
+    stats = {}
+    for name, cache in (('transcripts', current_app.transcript_cache), ('downloads', current_app.download_cache)):
+        stats[name] = dict(cache.stats(), enabled=True) if cache else {'enabled': False}
+    return jsonify(stats)
+
 @api.route('/process', methods=['POST'])
 def process_media():
     """Process media files for transcription."""
@@ -518,6 +651,14 @@ def process_media():
         # Then log it
         logger.info(f"Source type: {source_type}")
         logger.info(f"Source URL: {source_url}")
+
+        # Model size, language and decoding choices for this job
+        try:
+            options = parse_options(request.form, current_app.config)
+        except ValueError as e:
+            logger.error(f"Invalid transcription options: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Transcription options: {options}")
         
         if source_type == 'file':
             logger.info("Processing file upload...")
@@ -548,31 +689,60 @@ def process_media():
                         'error': f'File type not allowed for {file.filename}. Allowed types: {", ".join(current_app.config["ALLOWED_EXTENSIONS"])}'
                     }), 400
 
-            logger.info("All files validated, calling handle_file_uploads()")
-            response = handle_file_uploads()
-            logger.info("handle_file_uploads() completed")
-            return response
+            # The request body is gone once we return, so spool uploads to disk now;
+            # FileStorage.save copies in chunks rather than reading whole files
+            os.makedirs(current_app.config['TEMP_FOLDER'], exist_ok=True)
+            uploads = []
+            try:
+                for file in files:
+                    path = os.path.join(
+                        current_app.config['TEMP_FOLDER'],
+                        f"{uuid.uuid4().hex[:8]}_{secure_filename(file.filename)}"
+                    )
+                    file.save(path)
+                    uploads.append({
+                        'filename': file.filename,
+                        'content_type': file.content_type,
+                        'path': path,
+                        'size': os.path.getsize(path)
+                    })
+
+                logger.info("All files validated, queueing handle_file_uploads()")
+                job = queue_job(source_type, handle_file_uploads, uploads, options=options)
+            except Exception:
+                # The job never started, so nothing else will clean these up
+                for upload in uploads:
+                    if os.path.exists(upload['path']):
+                        os.remove(upload['path'])
+                raise
 
         elif source_type == 'video':
             logger.info("Processing video...")
             if not source_url:
                 return jsonify({'error': 'No URL provided'}), 400
-            response = handle_single_video(source_url)  # Pass the URL here
-            logger.info("Video processing completed")
-            return response
+            job = queue_job(source_type, handle_single_video, source_url, options=options)
 
         elif source_type == 'playlist':
             logger.info("Processing playlist...")
             if not source_url:
                 return jsonify({'error': 'No URL provided'}), 400
-            response = handle_playlist(source_url)  # Passing the URL is correct
-            logger.info("Playlist processing completed")
-            return response
+            job = queue_job(source_type, handle_playlist, source_url, options=options)
 
         else:
             logger.error(f"Invalid source type: {source_type}")
             return jsonify({'error': f'Invalid source type: {source_type}'}), 400
 
+        logger.info(f"Queued {source_type} job {job.id}")
+        return jsonify({
+            'status': 'queued',
+            'message': 'Processing started',
+            'job_id': job.id
+        }), 202
+
+    except QueueFullError as e:
+        logger.error(f"Rejecting process_media request: {e}")
+        return jsonify({'error': str(e)}), 503
+
     except Exception as e:
         logger.error("Error in process_media:")
         logger.error(str(e))
@@ -580,10 +750,106 @@ def process_media():
         return jsonify({'error': str(e)}), 500
 
 
+@api.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Get the status and, once finished, the result of a processing job"""
+    job = current_app.job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@api.route('/jobs/<job_id>/transcript')
+def get_job_transcript(job_id):
+    """Get one version of a job's transcript: ?version=preview for the quick
+    first pass, or final (the default) for the full-quality result"""
+    job = current_app.job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    version = request.args.get('version', 'final')
+    if version == 'preview':
+        transcript = job.preview
+    elif version == 'final':
+        transcript = job.result if job.status == 'complete' else None
+    else:
+        return jsonify({'error': "version must be 'preview' or 'final'"}), 400
+
+    if transcript is None:
+        return jsonify({'error': f"No {version} transcript yet", 'status': job.status}), 404
+    return jsonify({'job_id': job.id, 'version': version, 'status': job.status, **transcript})
+
 @api.route('/progress')
 def get_progress():
-    """Get current progress status"""
-    return jsonify(current_app.progress_tracker.get_progress())
+    """Get progress of the most recently started job"""
+    progress_tracker = current_app.progress_registry.latest()
+    if progress_tracker is None:
+        return jsonify(ProgressTracker().get_progress())
+    return jsonify(progress_tracker.get_progress())
+
+@api.route('/progress/<job_id>')
+def get_job_progress(job_id):
+    """Get progress of a single job"""
+    progress_tracker = current_app.progress_registry.get(job_id)
+    if progress_tracker is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(progress_tracker.get_progress())
+
+@api.route('/progress/<job_id>/stream')
+def stream_job_progress(job_id):
+    """Stream a job's progress as Server-Sent Events.
+
+    Each event carries the status fields plus only the segments the client
+    hasn't seen. The event id is the segment cursor, so a reconnecting
+    EventSource (Last-Event-ID) or ?cursor=N resumes where it left off.
+    """
+    progress_tracker = current_app.progress_registry.get(job_id)
+    if progress_tracker is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    # Every stream pins a server thread until the job ends, so only
+    # PROGRESS_STREAM_MAX run at once and the rest fall back to polling
+    streams = current_app.progress_streams
+    if not streams.acquire(blocking=False):
+        response = jsonify({'error': 'Too many progress streams open, poll /progress instead'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor') or 0
+    try:
+        cursor = int(cursor)
+    except ValueError:
+        cursor = 0
+    keepalive = current_app.config['PROGRESS_STREAM_KEEPALIVE']
+
+    def generate():
+        nonlocal cursor
+        version = None
+        while True:
+            current_version = progress_tracker.wait_for_change(version, timeout=keepalive)
+            if current_version == version:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            version = current_version
+
+            delta = progress_tracker.get_delta(cursor)
+            cursor = delta['cursor']
+            yield f"id: {cursor}\nevent: progress\ndata: {json.dumps(delta)}\n\n"
+
+            if delta['status'] in FINISHED_STATUSES:
+                break
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    # Runs when the server closes the response, whether the job finished or the client left
+    response.call_on_close(streams.release)
+    return response
 
 @api.route('/download/<filename>')
 def download_transcript(filename):
@@ -635,23 +901,18 @@ def download_transcript(filename):
 
 @api.route('/cancel', methods=['POST'])
 def cancel_transcription():
-    USE_FIREBASE = current_app.config['USE_FIREBASE']
-    TRANSCRIPTS_FOLDER = current_app.config['TRANSCRIPTS_FOLDER']
-    progress_tracker = current_app.progress_tracker
-
+    """Cancel a single job; remaining files or videos in it are skipped"""
     try:
-        # Reset progress tracker using its existing reset method
-        progress_tracker.reset()
+        job_id = request.form.get('job_id') or (request.get_json(silent=True) or {}).get('job_id')
+        if not job_id:
+            return jsonify({'error': 'No job_id provided'}), 400
 
-        if not USE_FIREBASE:
-            if os.path.exists(TRANSCRIPTS_FOLDER):
-                for file in os.listdir(TRANSCRIPTS_FOLDER):
-                    try:
-                        file_path = os.path.join(TRANSCRIPTS_FOLDER, file)
-                        logger.info(f"Deleting file: {file_path}")
-                        os.remove(file_path)
-                    except Exception as e:
-                        logger.error(f"Error deleting file {file}: {e}")
+        progress_tracker = current_app.progress_registry.get(job_id)
+        if progress_tracker is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        logger.info(f"Cancelling job {job_id}")
+        progress_tracker.cancel()
 
         return jsonify({'status': 'success', 'message': 'Transcription canceled'})
     except Exception as e:
@@ -1,79 +1,19 @@
 import os
+import threading
 from flask import Flask
 from flask_cors import CORS
 from config.settings import Config
 from api.routes import api
 from api.error_handlers import errors
-from core.progress import ProgressTracker
+from core.progress import ProgressRegistry
+from core.model_pool import get_model_pool
+from core.cache import get_transcript_cache, get_download_cache
+from core.proxies import get_proxy_manager
+from core.jobs import JobQueue
 from storage.firebase import FirebaseStorage
 from storage.local import LocalStorage
-
-
-import subprocess
-import sys
-import shutil
-
-import logging
-logger = logging.getLogger(__name__)
-
-# Set up ffmpeg
-def setup_ffmpeg():
-    logger.info("Setting up ffmpeg...")
-    # Create bin directory
-    os.makedirs("bin", exist_ok=True)
-    
-    # Skip apt-get and go straight to downloading static build
-    try:
-        logger.info("Downloading static ffmpeg build...")
-        # Use a fully static build with all dependencies included
-        subprocess.run([
-            "curl", "-L", 
-            "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz",
-            "-o", "ffmpeg.tar.xz"
-        ], check=True)
-        
-        # Extract
-        logger.info("Extracting ffmpeg...")
-        subprocess.run(["tar", "-xf", "ffmpeg.tar.xz"], check=True)
-        
-        # Find the extracted directory
-        dirs = [d for d in os.listdir() if os.path.isdir(d) and d.startswith("ffmpeg")]
-        if dirs:
-            logger.info(f"Found ffmpeg directory: {dirs[0]}")
-            # Copy ffmpeg to bin directory
-            shutil.copy(f"{dirs[0]}/ffmpeg", "bin/ffmpeg")
-            subprocess.run(["chmod", "+x", "bin/ffmpeg"], check=True)
-            logger.info("Copied ffmpeg to bin directory")
-        else:
-            logger.error("No ffmpeg directory found after extraction")
-            
-        # Cleanup
-        os.remove("ffmpeg.tar.xz")
-        
-        # Verify installation
-        if os.path.exists("bin/ffmpeg"):
-            logger.info("Static ffmpeg installed successfully")
-        else:
-            logger.error("bin/ffmpeg does not exist after installation")
-    except Exception as e:
-        logger.error(f"Static ffmpeg installation failed: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
-    
-    # Add bin to PATH but prioritize it FIRST
-    bin_path = os.path.join(os.getcwd(), "bin")
-    os.environ["PATH"] = f"{bin_path}:{os.environ['PATH']}"
-    logger.info(f"ffmpeg setup complete, PATH updated: {os.environ['PATH']}")
-    
-    # Test ffmpeg
-    try:
-        test_cmd = ["which", "ffmpeg"]
-        result = subprocess.run(test_cmd, capture_output=True, text=True)
-        logger.info(f"ffmpeg location: {result.stdout.strip()}")
-    except Exception as e:
-        logger.error(f"Failed to locate ffmpeg: {str(e)}")
-setup_ffmpeg()
-
+from storage.background import BackgroundUploader
+from utils.ffmpeg import setup_ffmpeg
 
 
 def create_app(config=Config):
@@ -92,13 +32,31 @@ def create_app(config=Config):
         }
     })
 
+    # Local lookup only: a bundled static build or the system's ffmpeg, checked once
+    setup_ffmpeg(config)
+
     # Initialize components
-    progress_tracker = ProgressTracker()
+    progress_registry = ProgressRegistry(max_jobs=config.PROGRESS_RETENTION)
     storage = FirebaseStorage(config) if config.USE_FIREBASE else LocalStorage(config)
+    model_pool = get_model_pool(config)
+    # Created here so the 'storage' backend can use the app's storage
+    transcript_cache = get_transcript_cache(config, storage)
     
     # IMPORTANT: Attach components to the app context
-    app.progress_tracker = progress_tracker
+    app.progress_registry = progress_registry
+    app.progress_streams = threading.BoundedSemaphore(config.PROGRESS_STREAM_MAX)
     app.storage = storage
+    app.uploader = BackgroundUploader(storage, max_workers=config.ARCHIVE_UPLOAD_WORKERS)
+    app.model_pool = model_pool
+    app.transcript_cache = transcript_cache
+    app.download_cache = get_download_cache(config)
+    app.proxy_manager = get_proxy_manager(config)
+    app.job_queue = JobQueue(
+        app,
+        max_workers=config.JOB_WORKERS,
+        max_pending=config.JOB_MAX_PENDING,
+        max_retained=config.JOB_RETENTION
+    )
 
 
     # Register blueprints
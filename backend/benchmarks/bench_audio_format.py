@@ -0,0 +1,95 @@
+"""Compare the cost of getting downloaded audio into Whisper for each AUDIO_FORMAT.
+
+Takes a file as yt-dlp's bestaudio download would leave it (m4a/webm/opus)
+and times the work each format does up to a 16 kHz float32 array, decoded
+with core.audio.decode_audio (ffmpeg straight to f32le) as the app does:
+
+    mp3     transcode to mp3, then decode the mp3
+    native  decode the original stream
+    pcm16k  convert to 16 kHz mono WAV, then read that
+
+With --start/--end each format is also timed decoding only that range, as
+a transcription with a time range does (ffmpeg seeks in the input).
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_audio_format path/to/download.webm --repeat 3 --start 600 --end 660
+"""
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+from whisper.audio import SAMPLE_RATE
+from core.audio import decode_audio
+
+
+def convert(source, destination, args):
+    subprocess.run(
+        ['ffmpeg', '-nostdin', '-y', '-loglevel', 'error', '-i', source, *args, destination],
+        check=True
+    )
+
+
+def prepare_mp3(source, workdir):
+    # Same settings yt-dlp's FFmpegExtractAudio uses for preferredcodec 'mp3'
+    destination = os.path.join(workdir, 'audio.mp3')
+    convert(source, destination, ['-vn', '-acodec', 'libmp3lame', '-q:a', '5'])
+    return destination
+
+
+def prepare_pcm16k(source, workdir):
+    destination = os.path.join(workdir, 'audio.wav')
+    convert(source, destination, ['-vn', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1'])
+    return destination
+
+
+PATHS = {
+    'mp3': prepare_mp3,
+    'native': lambda source, workdir: source,
+    'pcm16k': prepare_pcm16k
+}
+
+
+def cpu_seconds():
+    # This process plus the ffmpeg children it has waited for
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('audio')
+    parser.add_argument('--formats', nargs='+', default=list(PATHS), choices=list(PATHS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--start', type=float, help='also time decoding from here (seconds)')
+    parser.add_argument('--end', type=float, help='also time decoding up to here (seconds)')
+    args = parser.parse_args()
+
+    hours = len(decode_audio(args.audio)) / SAMPLE_RATE / 3600
+    print(f"{args.audio}: {hours * 60:.1f} minutes of audio")
+
+    runs = [('', None, None)]
+    if args.start or args.end is not None:
+        runs.append((' seek', args.start, args.end))
+
+    for name in args.formats:
+        for suffix, start, end in runs:
+            wall = cpu = 0
+            for _ in range(args.repeat):
+                with tempfile.TemporaryDirectory() as workdir:
+                    started, started_cpu = time.perf_counter(), cpu_seconds()
+                    audio = decode_audio(PATHS[name](args.audio, workdir), start=start, end=end)
+                    wall += time.perf_counter() - started
+                    cpu += cpu_seconds() - started_cpu
+            wall /= args.repeat
+            cpu /= args.repeat
+            decoded = len(audio) / SAMPLE_RATE / 3600
+            print(f"{name + suffix:12s} wall {wall:7.2f}s  cpu {cpu:7.2f}s  "
+                  f"per hour of audio: wall {wall / decoded:7.1f}s  cpu {cpu / decoded:7.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Compare batched transcription of short files with transcribing them one at a time.
+
+Throughput is reported as seconds of audio transcribed per CPU-second
+(all threads), so it reflects how much work each approach does rather than
+how well it spreads over cores. Give it a set of short files, such as voice
+memos; files are repeated to fill --count. Run from the backend directory:
+
+    python -m benchmarks.bench_batching memo1.m4a memo2.wav --count 12 --batch-sizes 4 8 16
+"""
+import argparse
+import itertools
+import time
+import whisper
+from whisper.audio import SAMPLE_RATE
+from core.audio import decode_audio
+from core.batching import transcribe_batch
+from core.engines import WhisperEngine
+from benchmarks.bench_audio_format import cpu_seconds
+
+
+def measure(fn):
+    started, started_cpu = time.perf_counter(), cpu_seconds()
+    fn()
+    return time.perf_counter() - started, cpu_seconds() - started_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('audio', nargs='+')
+    parser.add_argument('--count', type=int, default=12)
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[4, 8, 16])
+    args = parser.parse_args()
+
+    decoded = [decode_audio(path) for path in args.audio]
+    samples = list(itertools.islice(itertools.cycle(decoded), args.count))
+    duration = sum(len(audio) for audio in samples) / SAMPLE_RATE
+    print(f"{len(samples)} files, {duration:.0f}s of audio, model '{args.model}'")
+
+    model = whisper.load_model(args.model, device='cpu')
+    # Warm up so the first run doesn't pay for lazy initialisation
+    WhisperEngine.transcribe(model, samples[0], language='en', temperature=(0.0,))
+
+    def one_at_a_time():
+        for audio in samples:
+            WhisperEngine.transcribe(model, audio, language='en')
+
+    wall, cpu = measure(one_at_a_time)
+    baseline = duration / cpu
+    print(f"{'sequential':12s} wall {wall:7.1f}s  cpu {cpu:7.1f}s  {baseline:6.2f} audio-s per cpu-s")
+
+    for batch_size in args.batch_sizes:
+        wall, cpu = measure(lambda: transcribe_batch(model, samples, language='en', batch_size=batch_size))
+        print(f"{f'batch {batch_size}':12s} wall {wall:7.1f}s  cpu {cpu:7.1f}s  "
+              f"{duration / cpu:6.2f} audio-s per cpu-s  ({duration / cpu / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
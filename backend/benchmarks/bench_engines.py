@@ -0,0 +1,97 @@
+"""Compare transcription engines on a local sample set by real-time factor and word error rate.
+
+The sample directory holds audio files, each next to a reference transcript
+with the same name (lecture.mp3 + lecture.txt). Files without a reference
+still count towards RTF. Run from the backend directory:
+
+    python -m benchmarks.bench_engines benchmarks/samples --engines whisper faster-whisper --model base
+"""
+import argparse
+import os
+import re
+import time
+from whisper.audio import SAMPLE_RATE
+from core.audio import decode_audio
+from core.engines import ENGINES, get_engine
+
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.webm', '.opus', '.flac', '.ogg', '.mp4', '.mkv'}
+
+
+def normalize(text):
+    return re.sub(r"[^\w\s']", ' ', text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance between two word lists"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def load_samples(folder):
+    samples = []
+    for name in sorted(os.listdir(folder)):
+        base, ext = os.path.splitext(name)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference_path = os.path.join(folder, f"{base}.txt")
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, 'r', encoding='utf-8') as f:
+                reference = normalize(f.read())
+        samples.append((name, decode_audio(os.path.join(folder, name)), reference))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('samples')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--device', default='cpu')
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        parser.error(f"no audio files in {args.samples}")
+    total_audio = sum(len(audio) for _, audio, _ in samples) / SAMPLE_RATE
+    print(f"{len(samples)} samples, {total_audio:.0f}s of audio, model '{args.model}'")
+
+    for name in args.engines:
+        engine = get_engine(name)
+        started = time.perf_counter()
+        model = engine.load(args.model, args.device)
+        load_time = time.perf_counter() - started
+
+        elapsed = 0
+        errors = words = 0
+        for sample, audio, reference in samples:
+            started = time.perf_counter()
+            result = engine.transcribe(model, audio, language='en')
+            sample_time = time.perf_counter() - started
+            elapsed += sample_time
+
+            line = f"  {sample}: RTF {sample_time / (len(audio) / SAMPLE_RATE):.3f}"
+            if reference is not None:
+                sample_errors = word_errors(reference, normalize(result['text']))
+                errors += sample_errors
+                words += len(reference)
+                line += f"  WER {sample_errors / max(len(reference), 1):.3f}"
+            print(line)
+
+        wer = f"  WER {errors / words:.3f}" if words else ""
+        print(f"{name:15s} load {load_time:6.1f}s  transcribe {elapsed:7.1f}s  "
+              f"RTF {elapsed / total_audio:.3f}{wer}")
+        del model
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Compare serial and chunked multi-process transcription of one long file.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_parallel path/to/long_audio.mp3 --model base --workers 4 8
+"""
+import argparse
+import time
+import whisper
+from whisper.audio import SAMPLE_RATE
+from core.parallel import transcribe_parallel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('audio')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--chunk-seconds', type=int, default=300)
+    parser.add_argument('--overlap-seconds', type=float, default=2)
+    parser.add_argument('--skip-serial', action='store_true')
+    args = parser.parse_args()
+
+    audio = whisper.load_audio(args.audio)
+    duration = len(audio) / SAMPLE_RATE
+    model = whisper.load_model(args.model, device='cpu')
+    options = {'language': 'en', 'fp16': False}
+    print(f"{args.audio}: {duration:.0f}s of audio, model '{args.model}'")
+
+    serial_time = None
+    if not args.skip_serial:
+        started = time.perf_counter()
+        result = model.transcribe(audio, verbose=None, **options)
+        serial_time = time.perf_counter() - started
+        print(f"serial      {serial_time:8.1f}s  RTF {serial_time / duration:.3f}  "
+              f"{len(result['segments'])} segments")
+
+    for workers in args.workers:
+        started = time.perf_counter()
+        segments = transcribe_parallel(
+            model,
+            audio,
+            workers=workers,
+            chunk_seconds=args.chunk_seconds,
+            overlap_seconds=args.overlap_seconds,
+            options=options
+        )
+        elapsed = time.perf_counter() - started
+        speedup = f"  {serial_time / elapsed:.2f}x" if serial_time else ""
+        print(f"{workers:2d} workers  {elapsed:8.1f}s  RTF {elapsed / duration:.3f}  "
+              f"{len(segments)} segments{speedup}")
+
+
+if __name__ == '__main__':
+    main()
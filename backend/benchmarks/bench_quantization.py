@@ -0,0 +1,97 @@
+"""Measure the speed/accuracy trade-off of int8 dynamic quantization per model size.
+
+For each model size the float32 and int8 models transcribe the same files.
+WER is measured against a same-named .txt reference when one exists, and
+the int8 transcript is always compared against the float32 one, so the
+cost of quantizing shows up even without references. Run from the backend
+directory:
+
+    python -m benchmarks.bench_quantization sample1.mp3 sample2.wav --models base small
+"""
+import argparse
+import os
+import time
+import whisper
+from whisper.audio import SAMPLE_RATE
+from core.audio import decode_audio
+from core.engines import WhisperEngine, quantize_whisper
+from benchmarks.bench_engines import normalize, word_errors
+
+
+def model_megabytes(model):
+    # Packed int8 weights live in the state dict rather than in parameters()
+    state = model.state_dict()
+    total = 0
+    for value in state.values():
+        if hasattr(value, 'element_size'):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            total += sum(v.numel() * v.element_size() for v in value if hasattr(v, 'element_size'))
+    return total / 1024 / 1024
+
+
+def run(model, samples):
+    elapsed = 0
+    texts = []
+    for audio in samples:
+        started = time.perf_counter()
+        texts.append(WhisperEngine.transcribe(model, audio, language='en')['text'])
+        elapsed += time.perf_counter() - started
+    return elapsed, texts
+
+
+def wer(references, texts):
+    errors = words = 0
+    for reference, text in zip(references, texts):
+        if reference is None:
+            continue
+        errors += word_errors(reference, normalize(text))
+        words += len(reference)
+    return errors / words if words else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('audio', nargs='+')
+    parser.add_argument('--models', nargs='+', default=['tiny', 'base', 'small'])
+    args = parser.parse_args()
+
+    samples = [decode_audio(path) for path in args.audio]
+    references = []
+    for path in args.audio:
+        reference_path = f"{os.path.splitext(path)[0]}.txt"
+        if os.path.exists(reference_path):
+            with open(reference_path, 'r', encoding='utf-8') as f:
+                references.append(normalize(f.read()))
+        else:
+            references.append(None)
+    duration = sum(len(audio) for audio in samples) / SAMPLE_RATE
+    print(f"{len(samples)} files, {duration:.0f}s of audio")
+
+    for size in args.models:
+        model = whisper.load_model(size, device='cpu')
+        float_mb = model_megabytes(model)
+        float_time, float_texts = run(model, samples)
+
+        started = time.perf_counter()
+        model = quantize_whisper(model)
+        quantize_time = time.perf_counter() - started
+        int8_mb = model_megabytes(model)
+        int8_time, int8_texts = run(model, samples)
+
+        drift = wer([normalize(text) for text in float_texts], int8_texts)
+        drift = f"{drift:.3f}" if drift is not None else "n/a"
+        for label, elapsed, megabytes, texts in (
+            ('float32', float_time, float_mb, float_texts),
+            ('int8', int8_time, int8_mb, int8_texts)
+        ):
+            reference_wer = wer(references, texts)
+            reference_wer = f"  WER {reference_wer:.3f}" if reference_wer is not None else ""
+            print(f"{size:8s} {label:8s} {megabytes:7.1f} MB  RTF {elapsed / duration:.3f}{reference_wer}")
+        print(f"{size:8s} int8 is {float_time / int8_time:.2f}x faster, quantized in {quantize_time:.1f}s, "
+              f"WER vs float32 {drift}")
+        del model
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,3 @@
-from .settings import Config
+from .settings import Config, get_setting
 
-__all__ = ['Config']
\ No newline at end of file
+__all__ = ['Config', 'get_setting']
\ No newline at end of file
@@ -8,6 +8,8 @@ class Config:
     TEMP_FOLDER = 'temp_audio'
     TRANSCRIPTS_FOLDER = 'transcripts'
     ALLOWED_EXTENSIONS = {'mp3', 'mp4', 'wav', 'avi', 'mov', 'mkv', 'm4a'}
+    # ffmpeg binary to use; otherwise the one on PATH (installed from the Aptfile on deploys)
+    FFMPEG_PATH = os.getenv('FFMPEG_PATH')
 
     FIREBASE_AUDIO_FOLDER = 'audio'
     FIREBASE_TRANSCRIPT_FOLDER = 'transcripts'
@@ -21,4 +23,103 @@ class Config:
     ALLOWED_ORIGINS = os.getenv(
         'ALLOWED_ORIGINS',
         'http://localhost:5173,https://transcript-delta.vercel.app'
-    ).split(',')
\ No newline at end of file
+    ).split(',')
+
+    # Whisper model pool (one per gunicorn worker)
+    WHISPER_MODEL_SIZE = os.getenv('WHISPER_MODEL_SIZE', 'base')
+    WHISPER_DEVICE = os.getenv('WHISPER_DEVICE', 'cpu')
+    # 'whisper' (openai-whisper), 'whisper-int8' (its linear layers quantized to int8 at load)
+    # or 'faster-whisper' (CTranslate2 int8, needs `pip install faster-whisper`)
+    TRANSCRIBE_ENGINE = os.getenv('TRANSCRIBE_ENGINE', 'whisper')
+    # What /api/process callers may choose per job; DEFAULT_LANGUAGE may be 'auto'
+    ALLOWED_MODEL_SIZES = os.getenv('ALLOWED_MODEL_SIZES', 'tiny,base,small').split(',')
+    DEFAULT_LANGUAGE = os.getenv('DEFAULT_LANGUAGE', 'en')
+    MAX_BEAM_SIZE = int(os.getenv('MAX_BEAM_SIZE', 5))
+    # Two-pass mode: a rough transcript from a small model first (0 = preview the whole file)
+    PREVIEW_DEFAULT = os.getenv('PREVIEW_DEFAULT', 'false').lower() == 'true'
+    PREVIEW_MODEL_SIZE = os.getenv('PREVIEW_MODEL_SIZE', 'tiny')
+    PREVIEW_MAX_SECONDS = int(os.getenv('PREVIEW_MAX_SECONDS', 0))
+    # Copies of one model that may be leased at once, loaded only when all are busy.
+    # Defaults to UPLOAD_WORKERS so parallel uploads don't queue on a single copy.
+    MODEL_POOL_REPLICAS = int(os.getenv('MODEL_POOL_REPLICAS', os.getenv('UPLOAD_WORKERS', 2)))
+    # Models kept loaded, counting every replica; by default all replicas plus the preview model
+    MODEL_POOL_MAX_MODELS = int(os.getenv('MODEL_POOL_MAX_MODELS', MODEL_POOL_REPLICAS + 1))
+    MODEL_POOL_IDLE_TIMEOUT = int(os.getenv('MODEL_POOL_IDLE_TIMEOUT', 1800))
+
+    # Decode window by window and publish segments as they are produced
+    TRANSCRIBE_STREAMING = os.getenv('TRANSCRIBE_STREAMING', 'true').lower() == 'true'
+
+    # Split audio longer than PARALLEL_MIN_DURATION seconds across processes (1 disables)
+    PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', 1))
+    PARALLEL_MIN_DURATION = int(os.getenv('PARALLEL_MIN_DURATION', 600))
+    PARALLEL_CHUNK_SECONDS = int(os.getenv('PARALLEL_CHUNK_SECONDS', 300))
+    PARALLEL_OVERLAP_SECONDS = float(os.getenv('PARALLEL_OVERLAP_SECONDS', 2))
+    # Uploads up to BATCH_MAX_SECONDS long share batched encoder/decoder passes (1 disables)
+    BATCH_SIZE = int(os.getenv('BATCH_SIZE', 8))
+    BATCH_MAX_SECONDS = int(os.getenv('BATCH_MAX_SECONDS', 120))
+
+    # Background processing jobs
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', 20))
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 100))
+    PROGRESS_RETENTION = int(os.getenv('PROGRESS_RETENTION', 100))
+    PROGRESS_STREAM_KEEPALIVE = int(os.getenv('PROGRESS_STREAM_KEEPALIVE', 15))
+    # Each open progress stream holds a gunicorn thread for the job's lifetime;
+    # past this many, /stream answers 503 and clients poll /progress instead
+    PROGRESS_STREAM_MAX = int(os.getenv('PROGRESS_STREAM_MAX', 4))
+
+    # Playlist videos downloaded ahead of the one being transcribed
+    PLAYLIST_DOWNLOAD_WORKERS = int(os.getenv('PLAYLIST_DOWNLOAD_WORKERS', 2))
+    PLAYLIST_PREFETCH = int(os.getenv('PLAYLIST_PREFETCH', 2))
+    # Most videos one playlist job may take (0 = no limit); also the default max_items
+    PLAYLIST_MAX_ITEMS = int(os.getenv('PLAYLIST_MAX_ITEMS', 0))
+
+    # Uploaded files transcribed side by side, bounded by the decoded audio in flight
+    # (16 kHz float32, ~64 KB per second); keep MODEL_POOL_REPLICAS at least this
+    # high, and MODEL_POOL_MAX_MODELS above it, or transcriptions wait on one model
+    UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 2))
+    UPLOAD_MEMORY_BUDGET = int(os.getenv('UPLOAD_MEMORY_BUDGET', 512 * 1024 * 1024))
+
+    # Audio is archived to storage in the background while it's transcribed locally
+    ARCHIVE_UPLOAD_WORKERS = int(os.getenv('ARCHIVE_UPLOAD_WORKERS', 2))
+
+    # Transcripts cached by audio hash and model settings: 'disk', 'storage' or 'none'
+    TRANSCRIPT_CACHE = os.getenv('TRANSCRIPT_CACHE', 'disk')
+    TRANSCRIPT_CACHE_FOLDER = os.getenv('TRANSCRIPT_CACHE_FOLDER', 'transcript_cache')
+    TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv('TRANSCRIPT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+    # Downloaded audio: 'native' keeps the source stream, 'pcm16k' writes 16 kHz WAV, 'mp3' transcodes
+    AUDIO_FORMAT = os.getenv('AUDIO_FORMAT', 'native')
+
+    # Inputs at least this large are decoded to memory-mapped PCM in TEMP_FOLDER, kept for reuse
+    PCM_MMAP_MIN_BYTES = int(os.getenv('PCM_MMAP_MIN_BYTES', 20 * 1024 * 1024))
+    PCM_CACHE_MAX_BYTES = int(os.getenv('PCM_CACHE_MAX_BYTES', 4 * 1024 * 1024 * 1024))
+
+    # Silent stretches at least this long are cut out before decoding
+    VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+    VAD_MIN_SILENCE_SECONDS = float(os.getenv('VAD_MIN_SILENCE_SECONDS', 2.0))
+
+    # Downloaded audio kept per video ID so repeat requests skip yt-dlp and ffmpeg
+    DOWNLOAD_CACHE = os.getenv('DOWNLOAD_CACHE', 'true').lower() == 'true'
+    DOWNLOAD_CACHE_FOLDER = os.getenv('DOWNLOAD_CACHE_FOLDER', 'download_cache')
+    DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv('DOWNLOAD_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
+    # Proxies for yt-dlp downloads, comma-separated; 'direct' means no proxy. They're probed
+    # concurrently against PROXY_PROBE_URL and tried fastest first; PROXY_FAILURE_THRESHOLD
+    # failures in a row take a proxy out of rotation for PROXY_COOLDOWN seconds
+    PROXY_LIST = [proxy.strip() for proxy in os.getenv(
+        'PROXY_LIST',
+        'http://45.79.158.204:44554,http://165.227.71.60:80,http://157.245.222.183:80'
+    ).split(',') if proxy.strip()]
+    PROXY_PROBE_URL = os.getenv('PROXY_PROBE_URL', 'https://www.youtube.com/generate_204')
+    PROXY_PROBE_TIMEOUT = float(os.getenv('PROXY_PROBE_TIMEOUT', 5))
+    PROXY_PROBE_INTERVAL = int(os.getenv('PROXY_PROBE_INTERVAL', 300))
+    PROXY_FAILURE_THRESHOLD = int(os.getenv('PROXY_FAILURE_THRESHOLD', 2))
+    PROXY_COOLDOWN = int(os.getenv('PROXY_COOLDOWN', 300))
+
+
+def get_setting(config, name, default=None):
+    """Read a setting from either a Flask config dict or a Config class"""
+    if isinstance(config, dict):
+        return config.get(name, default)
+    return getattr(config, name, default)
@@ -1,5 +1,9 @@
 from .audio import AudioProcessor
-from .progress import ProgressTracker
+from .cache import DownloadCache, TranscriptCache, get_download_cache, get_transcript_cache
+from .engines import ENGINES, get_engine
+from .jobs import Job, JobQueue, QueueFullError
+from .model_pool import ModelPool, get_model_pool
+from .progress import ProgressRegistry, ProgressTracker
 from .transcription import Transcriber
 
-__all__ = ['AudioProcessor', 'ProgressTracker', 'Transcriber']
\ No newline at end of file
+__all__ = ['AudioProcessor', 'DownloadCache', 'get_download_cache', 'ENGINES', 'get_engine', 'Job', 'JobQueue', 'QueueFullError', 'ModelPool', 'get_model_pool', 'ProgressRegistry', 'ProgressTracker', 'TranscriptCache', 'get_transcript_cache', 'Transcriber']
\ No newline at end of file
@@ -1,8 +1,305 @@
 import yt_dlp
+from yt_dlp.extractor import gen_extractor_classes
+from yt_dlp.utils import PagedList, download_range_func
 from datetime import datetime
+import itertools
 import os
+import re
+import subprocess
+import tempfile
+import uuid
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+from core.cache import get_download_cache, link_or_copy
+from core.progress import JobCancelled
+from core.proxies import get_proxy_manager
+from config.settings import get_setting
 from utils.logger import logger
 
+# yt-dlp postprocessing per AUDIO_FORMAT. 'native' keeps the bestaudio stream
+# (m4a/webm/opus) as downloaded and 'pcm16k' writes the 16 kHz mono WAV Whisper
+# wants, so either way there's one decode instead of a lossy mp3 transcode.
+AUDIO_FORMAT_POSTPROCESSORS = {
+    'mp3': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3'}],
+    'native': [],
+    'pcm16k': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'wav'}]
+}
+
+# Redirects followed when resolving a playlist URL, and how deep playlists of
+# playlists (a channel's tabs) are expanded
+MAX_URL_HOPS = 5
+MAX_PLAYLIST_DEPTH = 2
+
+# The input's length as `ffmpeg -i` reports it; "Duration: N/A" when the container doesn't say
+DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+def decode_audio(path, sample_rate=SAMPLE_RATE, mmap_path=None, start=None, end=None):
+    """Decode any media file once into a mono float32 array at sample_rate.
+
+    ffmpeg emits float32 samples directly, so unlike whisper.load_audio there's
+    no int16 buffer to convert and the array is the only copy held. With
+    mmap_path the samples are written to that file instead and a copy-on-write
+    memmap over it is returned, keeping long recordings out of resident memory.
+    `start` and `end` (seconds) decode only that part; ffmpeg seeks in the
+    input rather than decoding and discarding everything before it.
+    """
+    cmd = ['ffmpeg', '-nostdin', '-threads', '0', '-loglevel', 'error']
+    if start:
+        cmd += ['-ss', f"{start:.3f}"]
+    if end is not None:
+        cmd += ['-t', f"{end - (start or 0):.3f}"]
+    cmd += [
+        '-i', path,
+        '-vn', '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate),
+        '-y', mmap_path or '-'
+    ]
+
+    with tempfile.TemporaryFile() as errors:
+        if mmap_path:
+            returncode = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=errors).returncode
+        else:
+            samples = bytearray()
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors) as proc:
+                for block in iter(lambda: proc.stdout.read(1024 * 1024), b''):
+                    samples += block
+            returncode = proc.returncode
+
+        if returncode != 0:
+            errors.seek(0)
+            message = errors.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"Failed to decode audio {path}: {message}")
+
+    if mmap_path:
+        if os.path.getsize(mmap_path) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(mmap_path, dtype=np.float32, mode='c')
+    # bytearray keeps the array writable without copying it
+    return np.frombuffer(samples, dtype=np.float32)
+
+
+def slice_paged(entries, start, stop=None, chunk=50):
+    """Entries start:stop of a yt-dlp PagedList, fetching pages only as they are reached.
+
+    PagedList.getslice() returns a list, so each call fetches every page it
+    covers; asking for `chunk` entries at a time keeps that lazy.
+    """
+    while stop is None or start < stop:
+        end = start + chunk if stop is None else min(start + chunk, stop)
+        batch = entries.getslice(start, end)
+        yield from batch
+        if len(batch) < end - start:
+            return
+        start = end
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds from its container headers, or None if unknown.
+
+    `ffmpeg -i` with no output only reads the headers, so this is a cheap
+    check before deciding whether (and how much) to decode. ffmpeg rather
+    than ffprobe, since a bundled build may ship ffmpeg alone.
+    """
+    cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-i', path]
+    try:
+        # Exits non-zero for want of an output file; the header is on stderr either way
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"Could not probe duration of {path}: {str(e)}")
+        return None
+    match = DURATION_PATTERN.search(result.stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def pcm_bytes(seconds, sample_rate=SAMPLE_RATE):
+    """Size of seconds of audio decoded to mono float32, as decode_audio returns it"""
+    return int(seconds * sample_rate * np.dtype(np.float32).itemsize)
+
+
+def detect_speech(audio, sample_rate=SAMPLE_RATE, frame_seconds=0.03, min_silence_seconds=2.0,
+                  padding_seconds=0.3, margin_db=10, dynamic_range_db=30):
+    """Energy-based voice activity detection.
+
+    Returns (start, end) sample ranges to keep. A frame counts as silent when
+    its level is within margin_db of the recording's noise floor and at least
+    dynamic_range_db below its loud parts, so quiet speech in a noisy room is
+    kept; only silent runs of min_silence_seconds or more are cut, leaving
+    padding_seconds on either side of the speech around them.
+    """
+    frame = int(frame_seconds * sample_rate)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    # Per-frame power without materialising a squared copy of the whole recording
+    frames = np.asarray(audio[:n_frames * frame]).reshape(n_frames, frame)
+    level_db = 10 * np.log10(np.einsum('ij,ij->i', frames, frames) / frame + 1e-10)
+    threshold = min(
+        np.percentile(level_db, 10) + margin_db,
+        np.percentile(level_db, 95) - dynamic_range_db
+    )
+    silent = level_db <= threshold
+
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    min_frames = int(np.ceil(min_silence_seconds / frame_seconds))
+    padding = int(padding_seconds * sample_rate)
+
+    regions = []
+    cursor = 0
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        if end - start < min_frames:
+            continue
+        # Leading/trailing silence is cut right to the edge of the file
+        cut_start = start * frame + padding if start > 0 else 0
+        cut_end = end * frame - padding if end < n_frames else len(audio)
+        if cut_end <= cut_start:
+            continue
+        if cut_start > cursor:
+            regions.append((int(cursor), int(cut_start)))
+        cursor = cut_end
+    if cursor < len(audio):
+        regions.append((int(cursor), len(audio)))
+    return regions
+
+
+class SpeechTimeline:
+    """Maps times in audio condensed to its speech regions back onto the original recording"""
+
+    def __init__(self, regions, sample_rate=SAMPLE_RATE):
+        self.regions = regions
+        lengths = np.array([end - start for start, end in regions], dtype=np.float64)
+        self.original_starts = np.array([start for start, _ in regions], dtype=np.float64) / sample_rate
+        self.condensed_starts = (np.cumsum(lengths) - lengths) / sample_rate
+
+    def condense(self, audio):
+        """The speech regions of audio, back to back.
+
+        A memory-mapped recording gets a CondensedAudio view instead of a copy,
+        so skipping its silence doesn't pull the speech into resident memory.
+        """
+        if not self.regions:
+            return np.zeros(0, dtype=np.float32)
+        if isinstance(audio, np.memmap):
+            return CondensedAudio(audio, self.regions)
+        return np.concatenate([audio[start:end] for start, end in self.regions])
+
+    def to_original(self, seconds, end=False):
+        # A segment ending exactly at a join belongs to the region before it
+        side = 'left' if end else 'right'
+        index = max(int(np.searchsorted(self.condensed_starts, seconds, side=side)) - 1, 0)
+        return float(self.original_starts[index] + seconds - self.condensed_starts[index])
+
+
+class CondensedAudio:
+    """The speech regions of audio, back to back, without copying them out of it.
+
+    A slice is read from the underlying audio when it's asked for: a view when
+    it falls inside one region, joined from the pieces when it spans a cut.
+    Decoding window by window therefore holds one window in memory at a time;
+    np.asarray() joins all of it, for callers that need the whole array.
+    """
+
+    def __init__(self, audio, regions):
+        self.audio = audio
+        self.regions = regions
+        # Where each region starts in the condensed audio, plus the total length
+        self.starts = np.cumsum([0] + [end - start for start, end in regions])
+
+    @property
+    def dtype(self):
+        return self.audio.dtype
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("CondensedAudio only supports contiguous slices")
+        start, stop, _ = key.indices(len(self))
+        index = int(np.searchsorted(self.starts, start, side='right')) - 1
+        pieces = []
+        while start < stop:
+            region_start, region_end = self.regions[index]
+            offset = region_start + start - int(self.starts[index])
+            take = min(stop - start, region_end - offset)
+            pieces.append(self.audio[offset:offset + take])
+            start += take
+            index += 1
+        if not pieces:
+            return np.zeros(0, dtype=self.dtype)
+        return pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+
+    def __array__(self, dtype=None, copy=None):
+        audio = np.asarray(self[:])
+        return audio if dtype is None else audio.astype(dtype)
+
+
+class PcmCache:
+    """Decoded samples for long recordings, kept as raw float32 files and memory-mapped.
+
+    Files are named by the source's sha256, so concurrent jobs on the same
+    media share one set of page-cache pages rather than each holding ~230 MB
+    per hour of audio, and a retried job skips decoding. The least recently
+    used files are deleted once the folder holds more than max_bytes.
+    """
+
+    def __init__(self, folder, max_bytes=4 * 1024 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, audio_hash):
+        return os.path.join(self.folder, f"pcm_{audio_hash[:32]}.f32")
+
+    def load(self, audio_file, audio_hash):
+        path = self._path(audio_hash)
+        if os.path.exists(path):
+            logger.info(f"Reusing decoded audio at {path}")
+            os.utime(path)
+            if os.path.getsize(path) == 0:
+                return np.zeros(0, dtype=np.float32)
+            return np.memmap(path, dtype=np.float32, mode='c')
+
+        # Decode under a temporary name so a half-written file is never reused
+        staging = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            audio = decode_audio(audio_file, mmap_path=staging)
+            os.replace(staging, path)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+        logger.info(f"Decoded {audio_file} to {path} ({os.path.getsize(path)} bytes)")
+        self._evict(keep=path)
+        return audio
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.folder):
+            if name.startswith('pcm_') and name.endswith('.f32'):
+                path = os.path.join(self.folder, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+
+        # Jobs still reading an evicted file keep their mapping; only the name goes
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            logger.info(f"Evicting decoded audio {path}")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
 class AudioProcessor:
 
     def __init__(self, config, progress_tracker):
@@ -12,9 +309,50 @@ class AudioProcessor:
 
         self.cookies_path = config.get('YOUTUBE_COOKIES_PATH')
         self.cookies_browser = config.get('YOUTUBE_COOKIES_BROWSER')
+        self.download_cache = get_download_cache(config)
+        self.proxies = get_proxy_manager(config)
+        self.audio_format = get_setting(config, 'AUDIO_FORMAT', 'native')
+        if self.audio_format not in AUDIO_FORMAT_POSTPROCESSORS:
+            logger.warning(f"Unknown AUDIO_FORMAT '{self.audio_format}', using 'native'")
+            self.audio_format = 'native'
+
+    @staticmethod
+    def video_key(url):
+        """Canonical 'Extractor:id' for the single video a URL points at, worked out without any network access.
 
-    def get_playlist_videos(self, url):
+        Different URLs for the same video (youtu.be, watch?v=...&t=..) map to
+        the same key. Only single-video extractors count: for watch?v=A&list=PL...
+        the suitable extractor is the playlist one, but downloads set noplaylist,
+        so the key is video A's. Returns None when the video's ID can't be told
+        from the URL alone.
+        """
+        matching = [
+            extractor for extractor in gen_extractor_classes()
+            if extractor._RETURN_TYPE == 'video' and extractor._match_valid_url(url)
+        ]
+        # Extractors that claim the URL outright first; the rest only match it
+        # because suitable() hands playlist URLs to the playlist extractor
+        for extractor in sorted(matching, key=lambda extractor: not extractor.suitable(url)):
+            video_id = extractor.get_temp_id(url)
+            if video_id:
+                return f"{extractor.ie_key()}:{video_id}"
+        return None
+
+    def get_playlist_videos(self, url, start=1, end=None, max_items=None):
         """Extract video URLs from a YouTube playlist."""
+        return list(self.iter_playlist_videos(url, start, end, max_items))
+
+    def iter_playlist_videos(self, url, start=1, end=None, max_items=None):
+        """Yield {'url', 'title'} per playlist video as yt-dlp resolves each page of entries.
+
+        Entries aren't processed up front, so the first video can be downloaded
+        while later pages are still being fetched. `start` and `end` are
+        1-based and inclusive, as with yt-dlp's --playlist-start/--playlist-end;
+        at most `max_items` videos are yielded. Once the playlist itself has
+        been resolved, self.playlist_count holds how many videos will be
+        yielded, or None if the playlist doesn't say how long it is.
+        """
+        self.playlist_count = None
         try:
             logger.info(f"Extracting videos from playlist: {url}")
             self.progress.update("Analyzing playlist...", 0)
@@ -34,47 +372,111 @@ class AudioProcessor:
 
 
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                playlist_info = ydl.extract_info(url, download=False)
-
-                # Changed to return list of dictionaries instead of just URLs
-                if 'entries' in playlist_info:
-                    videos = [
-                        {
-                            'url': entry.get('url', ''),
-                            'title': entry.get('title', f'Video {idx+1}')
-                        } 
-                        for idx, entry in enumerate(playlist_info['entries'])
-                    ]
-                    logger.info(f"Found {len(videos)} videos in playlist") 
-                    return videos
-                else:
+                # process=False leaves 'entries' as the extractor's lazy page iterator,
+                # but redirects (short links, channel -> /videos) are then ours to follow
+                playlist_info = self._resolve(ydl, ydl.extract_info(url, download=False, process=False))
+
+                if playlist_info.get('_type') not in ('playlist', 'multi_video'):
                     logger.info("No playlist entries found, treating as single video")
-                    return [{
+                    self.playlist_count = 1
+                    yield {
                         'url': playlist_info.get('webpage_url', url),
                         'title': playlist_info.get('title', 'Unknown Video')
-                    }]
+                    }
+                    return
+
+                start = max(start or 1, 1)
+                stop = end
+                if max_items:
+                    stop = min(stop, start - 1 + max_items) if stop else start - 1 + max_items
+                # Not `or []`: testing a PagedList for truth fetches its first page
+                entries = playlist_info.get('entries')
+                if entries is None:
+                    entries = []
+
+                if isinstance(entries, PagedList):
+                    # Paged APIs list videos only, so the range is cut from the pages
+                    # directly and pages before `start` are never fetched
+                    total = playlist_info.get('playlist_count')
+                    entries = slice_paged(entries, start - 1, stop)
+                else:
+                    # Channels list their tabs as nested playlists; count only a flat list
+                    total = playlist_info.get('playlist_count')
+                    if total is None and isinstance(entries, list) and not any(map(self._is_nested, entries)):
+                        total = len(entries)
+                    entries = itertools.islice(self._flatten(ydl, entries), start - 1, stop)
+
+                if total is not None:
+                    last = min(total, end) if end else total
+                    count = max(last - start + 1, 0)
+                    self.playlist_count = min(count, max_items) if max_items else count
+                    logger.info(f"Playlist has {total} videos, {self.playlist_count} selected")
+
+                for idx, entry in enumerate(entries, start):
+                    yield {
+                        'url': entry.get('url') or entry.get('webpage_url', ''),
+                        'title': entry.get('title') or f'Video {idx}'
+                    }
 
         except Exception as e:
             logger.error(f"Error extracting playlist info: {str(e)}")
             self.progress.update(f"Error getting playlist: {str(e)}")
-            return []
 
-    def download_audio(self, url ):
+    @staticmethod
+    def _resolve(ydl, info):
+        """Follow url/url_transparent results, as process=True would, until yt-dlp returns a video or playlist"""
+        for _ in range(MAX_URL_HOPS):
+            if info.get('_type') not in ('url', 'url_transparent'):
+                return info
+            resolved = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+            if info['_type'] == 'url_transparent':
+                # The outer result's fields (a title, say) win over the target's
+                resolved = dict(resolved, **{
+                    key: value for key, value in info.items()
+                    if value is not None and key not in ('_type', 'url', 'ie_key')
+                })
+            info = resolved
+        raise ValueError(f"Gave up after following {MAX_URL_HOPS} redirects from {info.get('url')}")
+
+    @staticmethod
+    def _is_nested(entry):
+        """Whether a flat entry is itself a playlist (a channel tab, say) rather than a video"""
+        if entry.get('_type') in ('playlist', 'multi_video'):
+            return True
+        if entry.get('_type') not in ('url', 'url_transparent') or not entry.get('ie_key'):
+            return False
+        extractor = yt_dlp.extractor.get_info_extractor(entry['ie_key'])
+        return extractor._RETURN_TYPE != 'video' and entry['ie_key'] != 'Generic'
+
+    def _flatten(self, ydl, entries, depth=0):
+        """Videos of entries in order, expanding nested playlists as they are reached"""
+        for entry in entries:
+            if not entry:
+                continue
+            if depth < MAX_PLAYLIST_DEPTH and self._is_nested(entry):
+                nested = self._resolve(ydl, entry)
+                if nested.get('_type') in ('playlist', 'multi_video'):
+                    yield from self._flatten(ydl, nested.get('entries') or [], depth + 1)
+                    continue
+                entry = nested
+            yield entry
+
+    def download_audio(self, url, start=None, end=None):
+        """Download a video's audio to TEMP_FOLDER; returns (filename, title), or (None, None) on failure.
+
+        With `start`/`end` (seconds) only that section is downloaded, so the
+        file begins at `start` of the original video.
+        """
         try: 
             logger.info(f"Starting download from URL: {url}")
             self.progress.update("Starting download...", 0)
         
-            # List of free proxy servers (you should replace these with more reliable ones)
-            proxy_list = [
-                'http://45.79.158.204:44554',
-                'http://165.227.71.60:80',
-                'http://157.245.222.183:80'
-            ]
-        
             if not url:
                 raise ValueError("No URL provided")
 
             def progress_hook(d):
+                # Raising from a hook is how yt-dlp lets a download be abandoned
+                self.progress.check_cancelled()
                 if d['status'] == 'downloading':
                     try:
                         percent = float(d['_percent_str'].replace('%', ''))
@@ -87,13 +489,39 @@ class AudioProcessor:
                 elif d['status'] == 'finished':
                     self.progress.update("Download complete, processing audio...", 100)
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Downloads can run concurrently, so the timestamp alone isn't unique
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S") + f"_{uuid.uuid4().hex[:8]}"
             output_template = f"audio_{timestamp}.%(ext)s"
 
-            # Try each proxy until success
+            # Sections are cached apart from the full video and from each other
+            section = ''
+            if start or end is not None:
+                section = f"@{start or 0:g}-{'' if end is None else f'{end:g}'}"
+
+            # Same video seen before: hand out a private copy of the cached audio
+            video_key = self.video_key(url)
+            if video_key:
+                video_key += section
+            if self.download_cache and video_key:
+                cached = self.download_cache.get(video_key)
+                if cached:
+                    cached_path, title = cached
+                    filename = os.path.join(
+                        self.config['TEMP_FOLDER'],
+                        f"audio_{timestamp}{os.path.splitext(cached_path)[1]}"
+                    )
+                    link_or_copy(cached_path, filename)
+                    logger.info(f"Download cache hit for {video_key}: {filename}")
+                    self.progress.update("Using previously downloaded audio", 100)
+                    return filename, title
+
+            # Try proxies fastest-first until one works; dead ones were weeded out by probing
             download_success = False
+            self.progress.update("Finding a working proxy...", 5)
+            proxy_list = self.proxies.ranked()
 
             for i, proxy in enumerate(proxy_list):
+                self.progress.check_cancelled()
                 try: 
                     logger.info(f"Trying with proxy {i+1}/{len(proxy_list)}: {proxy}")
                     self.progress.update(f"Trying proxy {i+1}/{len(proxy_list)}...", 10)
@@ -101,16 +529,22 @@ class AudioProcessor:
                     ydl_opts = {
                         'format': 'bestaudio/best',
                         'outtmpl': os.path.join(self.config['TEMP_FOLDER'], output_template),
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                        }],
+                        'postprocessors': AUDIO_FORMAT_POSTPROCESSORS[self.audio_format],
                         'progress_hooks': [progress_hook],
                         'verbose': True,
-                        'proxy': proxy,
+                        'proxy': self.proxies.ydl_proxy(proxy),
                         'socket_timeout': 30,
-                        'retries': 2
+                        'retries': 2,
+                        # A watch URL inside a playlist means that one video, not the whole list
+                        'noplaylist': True
                     }
+                    if self.audio_format == 'pcm16k':
+                        ydl_opts['postprocessor_args'] = {'extractaudio': ['-ar', '16000', '-ac', '1']}
+                    if section:
+                        # yt-dlp hands the range to ffmpeg, which only fetches that part of the stream
+                        ydl_opts['download_ranges'] = download_range_func(
+                            None, [(start or 0, end if end is not None else float('inf'))]
+                        )
 
                     #youtube cookies
                     if self.cookies_path:
@@ -126,10 +560,14 @@ class AudioProcessor:
                         # If we get here, download was successful
                         download_success = True
                         logger.info(f"Download successful with proxy {i+1}")
+                        self.proxies.record_success(proxy)
                         break
                 
                 except Exception as e:
+                    # yt-dlp may wrap the hook's JobCancelled; that's no fault of the proxy
+                    self.progress.check_cancelled()
                     logger.error(f"Download error: {str(e)}")
+                    self.proxies.record_failure(proxy)
                     self.progress.update(f"Proxy {i+1} failed, trying next...", 5)
                     # Continue to next proxy if this one fails
                     continue
@@ -137,8 +575,10 @@ class AudioProcessor:
             if not download_success: 
                 raise Exception("All proxies failed. Please try uploading the file directly instead.")
         
-            # Define the output filename
-            filename = os.path.join(
+            # yt-dlp reports where the file ended up after postprocessing;
+            # the extension depends on AUDIO_FORMAT and the source's codec
+            requested = info.get('requested_downloads') or [{}]
+            filename = requested[0].get('filepath') or os.path.join(
                 self.config['TEMP_FOLDER'],
                 f"audio_{timestamp}.mp3"
             )
@@ -162,9 +602,17 @@ class AudioProcessor:
         
             if file_size == 0:
                 raise Exception("Downloaded file is empty")
+
+            # Only a single video's audio is cached; a URL that still resolved to a
+            # playlist would otherwise file one arbitrary entry under the playlist's id
+            is_video = info.get('_type', 'video') == 'video'
+            if self.download_cache and is_video and info.get('id') and info.get('extractor_key'):
+                self.download_cache.put(f"{info['extractor_key']}:{info['id']}{section}", filename, info['title'])
             
             return filename, info['title']
-            
+
+        except JobCancelled:
+            raise
         except Exception as e:
             error_message = str(e)
             if "Sign in to confirm you're not a bot" in error_message:
@@ -0,0 +1,155 @@
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE
+from whisper.tokenizer import get_tokenizer
+from core.options import DEFAULT_TEMPERATURE
+
+# One timestamp token step: two mel frames after the encoder's stride
+TIME_PRECISION = 2 * HOP_LENGTH / SAMPLE_RATE
+
+# openai-whisper's transcribe() defaults for retrying a window at a higher temperature
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def split_windows(audios):
+    """Cut each audio into back-to-back 30-second windows.
+
+    Returns (audio index, start sample, end sample) per window, in order.
+    """
+    windows = []
+    for index, audio in enumerate(audios):
+        for start in range(0, len(audio), N_SAMPLES):
+            windows.append((index, start, min(start + N_SAMPLES, len(audio))))
+    return windows
+
+
+def parse_segments(tokens, tokenizer, window_seconds):
+    """Turn one window's decoded tokens into (start, end, text tokens) by their timestamp tokens"""
+    segments = []
+    start = None
+    text_tokens = []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+        time = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+        if text_tokens:
+            segments.append((start or 0.0, min(time, window_seconds), text_tokens))
+            text_tokens = []
+            start = None
+        else:
+            start = time
+    if text_tokens:
+        # Cut off without a closing timestamp; it runs to the end of the window
+        segments.append((start or 0.0, window_seconds, text_tokens))
+    return segments
+
+
+def needs_fallback(result):
+    """Whether a window should be retried at the next temperature, by transcribe()'s rule"""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        # Likely silence: it is dropped from the transcript, so retrying won't help
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def decode_batch(model, mels, language=None, beam_size=None, temperature=DEFAULT_TEMPERATURE):
+    """Decode a stack of log-mel windows with one encoder pass and batched decoding.
+
+    The encoder output is kept, so windows whose result looks like a
+    hallucination are retried together at the next temperature without
+    re-encoding, as openai-whisper's transcribe() does one window at a time.
+    Returns one DecodingResult per window.
+    """
+    with torch.no_grad():
+        # whisper.decode takes encoder output in place of mels and skips the encoder
+        features = model.embed_audio(mels)
+
+    results = [None] * len(mels)
+    pending = list(range(len(mels)))
+    for attempt, t in enumerate(temperature):
+        # Beam search only applies to greedy decoding, as in transcribe()
+        beam = beam_size if t == 0 else None
+        options = whisper.DecodingOptions(language=language, temperature=t, beam_size=beam, fp16=False)
+        if beam:
+            # openai-whisper's beam search mixes up its cache with more than one
+            # audio in the batch, so those windows are decoded one by one
+            decoded = [whisper.decode(model, features[index], options) for index in pending]
+        else:
+            decoded = whisper.decode(model, features[pending], options)
+        is_last = attempt == len(temperature) - 1
+        retry = []
+        for index, result in zip(pending, decoded):
+            results[index] = result
+            if not is_last and needs_fallback(result):
+                retry.append(index)
+        if not retry:
+            break
+        pending = retry
+    return results
+
+
+def transcribe_batch(model, audios, language=None, beam_size=None, temperature=DEFAULT_TEMPERATURE,
+                     batch_size=8, on_batch=None):
+    """Transcribe several short audios by batching their 30-second windows through the model.
+
+    Every window goes through the encoder padded to 30 seconds anyway, so
+    stacking windows from different files into one (batch, n_mels, 3000)
+    tensor lets one encoder pass and one decoding loop serve them all.
+    Windows of the same file are decoded independently, without the previous
+    window's text as a prompt. Returns one {'text', 'segments', 'language'}
+    dict per audio, in order; on_batch is called with (windows done, total)
+    after each batch.
+    """
+    windows = split_windows(audios)
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=model.num_languages,
+        language=language or 'en',
+        task='transcribe'
+    )
+
+    decoded = []
+    for batch_start in range(0, len(windows), batch_size):
+        batch = windows[batch_start:batch_start + batch_size]
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(torch.as_tensor(audios[index][start:end]), N_SAMPLES),
+                model.dims.n_mels
+            )[:, :N_FRAMES]
+            for index, start, end in batch
+        ]).to(model.device)
+        decoded.extend(decode_batch(model, mels, language, beam_size, temperature))
+        if on_batch:
+            on_batch(len(decoded), len(windows))
+
+    results = [{'text': '', 'segments': [], 'language': language} for _ in audios]
+    for (index, start, end), result in zip(windows, decoded):
+        output = results[index]
+        output['language'] = output['language'] or result.language
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            continue
+
+        offset = start / SAMPLE_RATE
+        for seg_start, seg_end, text_tokens in parse_segments(result.tokens, tokenizer, (end - start) / SAMPLE_RATE):
+            text = tokenizer.decode(text_tokens)
+            if not text.strip():
+                continue
+            output['segments'].append({
+                'id': len(output['segments']),
+                'seek': start // HOP_LENGTH,
+                'start': offset + seg_start,
+                'end': offset + seg_end,
+                'text': text,
+                'tokens': text_tokens,
+                'temperature': result.temperature,
+                'avg_logprob': result.avg_logprob,
+                'compression_ratio': result.compression_ratio,
+                'no_speech_prob': result.no_speech_prob
+            })
+
+    for output in results:
+        output['text'] = ''.join(segment['text'] for segment in output['segments'])
+    return results
@@ -0,0 +1,390 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import threading
+from collections import OrderedDict
+from config.settings import get_setting
+from utils.logger import logger
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks so large media never has to fit in memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskCacheBackend:
+    """Stores cache entries as JSON files in a local folder"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def read(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, key, data):
+        # Write then rename so a concurrent reader never sees half an entry
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """(key, size) for existing entries, least recently used first"""
+        found = []
+        for name in os.listdir(self.folder):
+            if not name.endswith('.json'):
+                continue
+            stat = os.stat(os.path.join(self.folder, name))
+            found.append((stat.st_mtime, name[:-5], stat.st_size))
+        return [(key, size) for _, key, size in sorted(found)]
+
+    def touch(self, key):
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class StorageCacheBackend:
+    """Stores cache entries through a LocalStorage/FirebaseStorage backend.
+
+    Storage backends can't list or read in place, so entries are fetched via
+    download_file and the LRU index only covers entries written by this process.
+    """
+
+    def __init__(self, storage, folder):
+        self.storage = storage
+        self.folder = folder
+
+    def _path(self, key):
+        return f"{self.folder}/{key}.json"
+
+    def read(self, key):
+        fd, temp_path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            if not self.storage.download_file(self._path(key), temp_path):
+                return None
+            with open(temp_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        finally:
+            os.remove(temp_path)
+
+    def write(self, key, data):
+        self.storage.save_file(data, self.folder, f"{key}.json")
+
+    def delete(self, key):
+        self.storage.delete_file(self._path(key))
+
+    def entries(self):
+        return []
+
+    def touch(self, key):
+        pass
+
+
+class TranscriptCache:
+    """Content-addressed transcript cache with size-bounded LRU eviction.
+
+    Entries are keyed by the audio's sha256 plus every setting that changes the
+    output (model size, language, decoding options), so a re-upload of the same
+    file or a re-submitted URL is answered without touching the model.
+    """
+
+    def __init__(self, backend, max_bytes=256 * 1024 * 1024):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+        for key, size in backend.entries():
+            self._index[key] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def make_key(audio_hash, settings):
+        payload = json.dumps({'audio': audio_hash, 'settings': settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        try:
+            data = self.backend.read(key)
+        except Exception as e:
+            logger.error(f"Error reading transcript cache entry {key}: {e}")
+            data = None
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                if key in self._index:
+                    self._total -= self._index.pop(key)
+                return None
+            self.hits += 1
+            if key not in self._index:
+                self._index[key] = len(data.encode('utf-8'))
+                self._total += self._index[key]
+            self._index.move_to_end(key)
+
+        self.backend.touch(key)
+        return json.loads(data)
+
+    def put(self, key, result):
+        data = json.dumps(result)
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        try:
+            self.backend.write(key, data)
+        except Exception as e:
+            logger.error(f"Error writing transcript cache entry {key}: {e}")
+            return
+
+        with self._lock:
+            self._total -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._total += size
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._total > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            logger.info(f"Evicting transcript cache entry {key}")
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                logger.error(f"Error evicting transcript cache entry {key}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def link_or_copy(source, destination):
+    """Hard-link when source and destination share a filesystem, copy otherwise"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class DownloadCache:
+    """Extracted audio for previously downloaded videos, keyed by canonical video ID.
+
+    Each entry is an audio file plus a JSON sidecar holding the title, size and
+    sha256; an entry whose file no longer matches is dropped on lookup. Entries
+    are evicted least recently used first once max_bytes of audio is held.
+    """
+
+    def __init__(self, folder, max_bytes=2 * 1024 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+        found = []
+        for name in os.listdir(folder):
+            if name.endswith('.json'):
+                meta_path = os.path.join(folder, name)
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        size = json.load(f)['size']
+                except Exception:
+                    continue
+                found.append((os.stat(meta_path).st_mtime, name[:-5], size))
+        for _, digest, size in sorted(found):
+            self._index[digest] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def _digest(self, key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    def _meta_path(self, digest):
+        return os.path.join(self.folder, f"{digest}.json")
+
+    def get(self, key):
+        """Return (audio_path, title) for a valid entry, else None"""
+        digest = self._digest(key)
+        try:
+            with open(self._meta_path(digest), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            audio_path = os.path.join(self.folder, meta['filename'])
+            valid = (
+                os.path.getsize(audio_path) == meta['size']
+                and file_sha256(audio_path) == meta['sha256']
+            )
+        except (OSError, ValueError, KeyError):
+            meta, valid = None, False
+
+        with self._lock:
+            if not valid:
+                self.misses += 1
+                if meta is not None:
+                    logger.warning(f"Dropping invalid download cache entry for {key}")
+                    self._remove(digest)
+                return None
+            self.hits += 1
+            if digest not in self._index:
+                self._index[digest] = meta['size']
+                self._total += meta['size']
+            self._index.move_to_end(digest)
+
+        os.utime(self._meta_path(digest))
+        return audio_path, meta['title']
+
+    def put(self, key, audio_file, title):
+        size = os.path.getsize(audio_file)
+        if size > self.max_bytes:
+            return
+
+        digest = self._digest(key)
+        filename = f"{digest}{os.path.splitext(audio_file)[1]}"
+        audio_path = os.path.join(self.folder, filename)
+        try:
+            # Link/copy under a temporary name, then rename, so readers never see a partial file
+            staging = f"{audio_path}.{threading.get_ident()}.tmp"
+            link_or_copy(audio_file, staging)
+            os.replace(staging, audio_path)
+            meta = {
+                'key': key,
+                'title': title,
+                'filename': filename,
+                'size': size,
+                'sha256': file_sha256(audio_path),
+                'stored_at': time.time()
+            }
+            with open(self._meta_path(digest), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except Exception as e:
+            logger.error(f"Error caching download for {key}: {e}")
+            return
+
+        with self._lock:
+            self._total -= self._index.pop(digest, 0)
+            self._index[digest] = size
+            self._total += size
+            self._evict()
+
+    def _remove(self, digest):
+        # Caller holds the lock
+        self._total -= self._index.pop(digest, 0)
+        meta_path = self._meta_path(digest)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                filename = json.load(f).get('filename')
+        except (OSError, ValueError):
+            filename = None
+        for path in (meta_path, filename and os.path.join(self.folder, filename)):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._total > self.max_bytes and self._index:
+            digest = next(iter(self._index))
+            logger.info(f"Evicting download cache entry {digest}")
+            try:
+                self._remove(digest)
+            except Exception as e:
+                logger.error(f"Error evicting download cache entry {digest}: {e}")
+                self._total -= self._index.pop(digest, 0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_transcript_cache(config=None, storage=None):
+    """Process-wide transcript cache, or None when TRANSCRIPT_CACHE is 'none'.
+
+    TRANSCRIPT_CACHE picks the backend: 'disk' (default) keeps entries in
+    TRANSCRIPT_CACHE_FOLDER, 'storage' writes them through the app's storage
+    backend so they survive redeploys when that is Firebase.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            kind = get_setting(config, 'TRANSCRIPT_CACHE', 'disk')
+            if kind == 'none':
+                return None
+
+            folder = get_setting(config, 'TRANSCRIPT_CACHE_FOLDER', 'transcript_cache')
+            if kind == 'storage' and storage is not None:
+                backend = StorageCacheBackend(storage, folder)
+            else:
+                if kind == 'storage':
+                    logger.warning("No storage backend available for the transcript cache, using disk")
+                backend = DiskCacheBackend(folder)
+
+            _shared_cache = TranscriptCache(
+                backend,
+                max_bytes=get_setting(config, 'TRANSCRIPT_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+            )
+        return _shared_cache
+
+
+_shared_download_cache = None
+
+
+def get_download_cache(config=None):
+    """Process-wide download cache, or None when DOWNLOAD_CACHE is off"""
+    global _shared_download_cache
+    with _shared_cache_lock:
+        if _shared_download_cache is None:
+            if not get_setting(config, 'DOWNLOAD_CACHE', True):
+                return None
+            _shared_download_cache = DownloadCache(
+                get_setting(config, 'DOWNLOAD_CACHE_FOLDER', 'download_cache'),
+                max_bytes=get_setting(config, 'DOWNLOAD_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024)
+            )
+        return _shared_download_cache
@@ -0,0 +1,136 @@
+import torch
+import torch.nn as nn
+import whisper
+from core.options import DEFAULT_TEMPERATURE
+from utils.logger import logger
+
+
+class WhisperEngine:
+    """openai-whisper on PyTorch; the reference engine and the only one parallel.py can share"""
+
+    name = 'whisper'
+    supports_parallel = True
+    # Models core.batching can drive through whisper.decode
+    supports_batching = True
+
+    @staticmethod
+    def load(model_size, device):
+        return whisper.load_model(model_size, device=device)
+
+    @staticmethod
+    def transcribe(model, audio, language='en', initial_prompt=None, verbose=None, beam_size=None,
+                   temperature=DEFAULT_TEMPERATURE, condition_on_previous_text=True):
+        return model.transcribe(
+            audio,
+            language=language,
+            fp16=False,
+            initial_prompt=initial_prompt,
+            verbose=verbose,
+            beam_size=beam_size,
+            temperature=temperature,
+            condition_on_previous_text=condition_on_previous_text
+        )
+
+
+def quantize_whisper(model):
+    """Apply dynamic int8 quantization to a CPU Whisper model's linear layers, in place.
+
+    whisper.model.Linear subclasses nn.Linear and quantize_dynamic matches
+    module types exactly, so those layers are swapped for plain nn.Linear
+    (sharing the same weights) first, or nothing would be quantized.
+    """
+    for parent in list(model.modules()):
+        for name, child in parent.named_children():
+            if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+                linear = nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.weight = child.weight
+                linear.bias = child.bias
+                setattr(parent, name, linear)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class WhisperInt8Engine(WhisperEngine):
+    """openai-whisper with int8 weights in its linear layers; CPU only.
+
+    Quantized once when the pool loads the model, so the pool holds the
+    quantized copy. Packed int8 weights aren't parameters and can't be put in
+    shared memory, so this engine doesn't run chunks in parallel processes.
+    """
+
+    name = 'whisper-int8'
+    supports_parallel = False
+
+    @staticmethod
+    def load(model_size, device):
+        if device != 'cpu':
+            raise ValueError("The whisper-int8 engine only runs on CPU")
+        return quantize_whisper(whisper.load_model(model_size, device='cpu'))
+
+
+class FasterWhisperEngine:
+    """CTranslate2 port of Whisper (faster-whisper) running int8 on CPU.
+
+    faster-whisper is an optional dependency, only imported when this engine
+    is selected. Results are converted to openai-whisper's segment dicts so
+    the rest of the pipeline can't tell the engines apart.
+    """
+
+    name = 'faster-whisper'
+    supports_parallel = False
+    supports_batching = False
+    compute_type = 'int8'
+
+    @classmethod
+    def load(cls, model_size, device):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError(
+                "TRANSCRIBE_ENGINE is 'faster-whisper' but faster-whisper is not installed "
+                "(pip install faster-whisper)"
+            )
+        return WhisperModel(model_size, device=device, compute_type=cls.compute_type)
+
+    @staticmethod
+    def transcribe(model, audio, language='en', initial_prompt=None, verbose=None, beam_size=None,
+                   temperature=DEFAULT_TEMPERATURE, condition_on_previous_text=True):
+        # No beam size means greedy decoding, as in openai-whisper
+        segments, info = model.transcribe(
+            audio,
+            language=language,
+            initial_prompt=initial_prompt,
+            beam_size=beam_size or 1,
+            temperature=list(temperature),
+            condition_on_previous_text=condition_on_previous_text
+        )
+        result_segments = []
+        for segment in segments:
+            result_segments.append({
+                'id': len(result_segments),
+                'seek': segment.seek,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'tokens': list(segment.tokens),
+                'temperature': segment.temperature,
+                'avg_logprob': segment.avg_logprob,
+                'compression_ratio': segment.compression_ratio,
+                'no_speech_prob': segment.no_speech_prob
+            })
+            if verbose:
+                logger.info(f"[{segment.start:.3f} --> {segment.end:.3f}] {segment.text}")
+
+        return {
+            'text': ''.join(segment['text'] for segment in result_segments),
+            'segments': result_segments,
+            'language': info.language
+        }
+
+
+ENGINES = {engine.name: engine for engine in (WhisperEngine, WhisperInt8Engine, FasterWhisperEngine)}
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine '{name}'. Available: {', '.join(ENGINES)}")
+    return ENGINES[name]
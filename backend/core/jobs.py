@@ -0,0 +1,133 @@
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import logger
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_type, job_id=None, progress_tracker=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.type = job_type
+        self.status = 'queued'
+        self.result = None
+        self.status_code = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Tells _run whether the job ended because it was cancelled
+        self.progress_tracker = progress_tracker
+        # Quick first-pass transcripts, by item index, while the full pass runs
+        self._previews = {}
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ('complete', 'error', 'cancelled')
+
+    def set_preview(self, index, title, preview):
+        with self._lock:
+            self._previews[index] = dict(preview, title=title)
+
+    @property
+    def preview(self):
+        with self._lock:
+            if not self._previews:
+                return None
+            return {'transcripts': [self._previews[index] for index in sorted(self._previews)]}
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'error': self.error,
+            'result': self.result,
+            'preview': self.preview,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """Runs processing handlers on a bounded thread pool so requests return a job ID immediately.
+
+    Handlers run inside an app context and return a (payload, status_code)
+    tuple, the same shape a Flask view returns. Threads rather than processes
+    are used so jobs share the worker's model pool and storage client.
+    """
+
+    def __init__(self, app, max_workers=2, max_pending=20, max_retained=100):
+        self.app = app
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job_type, fn, *args, job_id=None, progress_tracker=None, **kwargs):
+        job = Job(job_type, job_id, progress_tracker)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == 'queued')
+            if pending >= self.max_pending:
+                raise QueueFullError("Too many jobs are waiting, please try again later")
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        logger.info(f"Job {job.id} ({job.type}) started")
+
+        with self.app.app_context():
+            try:
+                result, status_code = fn(*args, **kwargs)
+                job.result = result
+                job.status_code = status_code
+                if status_code >= 400:
+                    job.error = result.get('error', 'Processing failed')
+                    job.status = 'error'
+                else:
+                    job.status = 'complete'
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}")
+                logger.error(traceback.format_exc())
+                job.error = str(e)
+                job.status_code = 500
+                job.status = 'error'
+
+        # However the handler wound up, a job the user cancelled reports as cancelled
+        if job.progress_tracker is not None and job.progress_tracker.cancelled:
+            job.status = 'cancelled'
+            job.error = 'Job was cancelled'
+
+        job.finished_at = time.time()
+        logger.info(f"Job {job.id} finished with status {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+    def _prune(self):
+        # Forget the oldest finished jobs once we hold more than max_retained
+        excess = len(self._jobs) - self.max_retained
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+                excess -= 1
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,181 @@
+import gc
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from config.settings import get_setting
+from core.engines import ENGINES
+from utils.logger import logger
+
+
+class PooledModel:
+    def __init__(self, key, model, load_time):
+        self.key = key
+        self.model = model
+        self.load_time = load_time
+        self.in_use = False
+        self.last_used = time.monotonic()
+
+
+class ModelPool:
+    """Keeps loaded models around so each (engine, model size, device) loads once per process.
+
+    A model instance is leased to one caller at a time, because Whisper installs
+    kv-cache hooks on the shared modules while decoding. `replicas` controls how
+    many instances of the same key may exist so concurrent jobs don't queue.
+    """
+
+    def __init__(self, max_models=2, replicas=1, idle_timeout=1800, loaders=None):
+        self.max_models = max(1, max_models)
+        self.replicas = max(1, replicas)
+        self.idle_timeout = idle_timeout
+        # engine name -> loader(model_size, device)
+        self.loaders = loaders or {name: engine.load for name, engine in ENGINES.items()}
+
+        self._instances = OrderedDict()  # id(instance) -> PooledModel, oldest use first
+        self._loading = {}               # key -> number of loads in flight
+        self._cond = threading.Condition()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time_total = 0.0
+
+    @contextmanager
+    def acquire(self, model_size, device='cpu', engine='whisper'):
+        """Lease a model for the duration of the with-block, loading it on a miss"""
+        instance = self._checkout((engine, model_size, device))
+        try:
+            yield instance.model
+        finally:
+            self._release(instance)
+
+    def _checkout(self, key):
+        with self._cond:
+            while True:
+                self._evict_idle()
+
+                for instance in self._instances.values():
+                    if instance.key == key and not instance.in_use:
+                        instance.in_use = True
+                        self._instances.move_to_end(id(instance))
+                        self.hits += 1
+                        return instance
+
+                existing = sum(1 for i in self._instances.values() if i.key == key)
+                if existing + self._loading.get(key, 0) < self.replicas:
+                    self._loading[key] = self._loading.get(key, 0) + 1
+                    self.misses += 1
+                    break
+
+                # Every replica of this key is busy; wait for one to come back
+                self._cond.wait()
+
+        # Load outside the lock so requests for other models aren't blocked
+        try:
+            engine, model_size, device = key
+            logger.info(f"Loading {engine} model '{model_size}' on {device}...")
+            started = time.perf_counter()
+            model = self.loaders[engine](model_size, device)
+            load_time = time.perf_counter() - started
+            logger.info(f"Loaded {engine} model '{model_size}' on {device} in {load_time:.2f}s")
+        except Exception:
+            with self._cond:
+                self._loading[key] -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._loading[key] -= 1
+            instance = PooledModel(key, model, load_time)
+            instance.in_use = True
+            self._instances[id(instance)] = instance
+            self.load_time_total += load_time
+            self._evict_over_capacity()
+            return instance
+
+    def _release(self, instance):
+        with self._cond:
+            instance.in_use = False
+            instance.last_used = time.monotonic()
+            # The instance may have been pushed out while it was busy
+            if id(instance) in self._instances:
+                self._evict_over_capacity()
+            self._cond.notify_all()
+
+    def _evict_idle(self):
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        for instance in list(self._instances.values()):
+            if not instance.in_use and now - instance.last_used > self.idle_timeout:
+                self._evict(instance, 'idle')
+
+    def _evict_over_capacity(self):
+        # Least recently used first; busy models are never evicted
+        for instance in list(self._instances.values()):
+            if len(self._instances) <= self.max_models:
+                break
+            if not instance.in_use:
+                self._evict(instance, 'capacity')
+
+    def _evict(self, instance, reason):
+        engine, model_size, device = instance.key
+        logger.info(f"Evicting {engine} model '{model_size}' on {device} ({reason})")
+        del self._instances[id(instance)]
+        instance.model = None
+        self.evictions += 1
+        gc.collect()
+
+    def evict_idle(self):
+        """Drop models that have not been used within idle_timeout"""
+        with self._cond:
+            self._evict_idle()
+
+    def clear(self):
+        """Drop every model that is not currently leased"""
+        with self._cond:
+            for instance in list(self._instances.values()):
+                if not instance.in_use:
+                    self._evict(instance, 'cleared')
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'load_time_total': round(self.load_time_total, 3),
+                'max_models': self.max_models,
+                'replicas': self.replicas,
+                'idle_timeout': self.idle_timeout,
+                'models': [
+                    {
+                        'engine': instance.key[0],
+                        'model': instance.key[1],
+                        'device': instance.key[2],
+                        'in_use': instance.in_use,
+                        'load_time': round(instance.load_time, 3),
+                        'idle_seconds': 0 if instance.in_use else round(now - instance.last_used, 1)
+                    }
+                    for instance in self._instances.values()
+                ]
+            }
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_model_pool(config=None):
+    """Return the process-wide model pool, creating it from config on first use"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ModelPool(
+                max_models=get_setting(config, 'MODEL_POOL_MAX_MODELS', 2),
+                replicas=get_setting(config, 'MODEL_POOL_REPLICAS', 1),
+                idle_timeout=get_setting(config, 'MODEL_POOL_IDLE_TIMEOUT', 1800)
+            )
+        return _shared_pool
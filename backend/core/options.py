@@ -0,0 +1,140 @@
+import math
+from whisper.tokenizer import LANGUAGES, TO_LANGUAGE_CODE
+from config.settings import get_setting
+
+# openai-whisper's own fallback schedule
+DEFAULT_TEMPERATURE = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+def parse_time(value):
+    """Seconds from '5400', '5400.5', '90:00' or '1:30:00'"""
+    parts = str(value).strip().split(':')
+    if len(parts) > 3:
+        raise ValueError
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    if seconds < 0 or not math.isfinite(seconds):
+        raise ValueError
+    return seconds
+
+
+def default_options(config):
+    """Options a job gets for anything the request doesn't specify"""
+    language = get_setting(config, 'DEFAULT_LANGUAGE', 'en')
+    return {
+        'model_size': get_setting(config, 'WHISPER_MODEL_SIZE', 'base'),
+        'language': None if language == 'auto' else language,
+        'beam_size': None,
+        'temperature': DEFAULT_TEMPERATURE,
+        'condition_on_previous_text': True,
+        'preview': get_setting(config, 'PREVIEW_DEFAULT', False),
+        'playlist_start': 1,
+        'playlist_end': None,
+        'max_items': get_setting(config, 'PLAYLIST_MAX_ITEMS', 0) or None,
+        'start_time': None,
+        'end_time': None
+    }
+
+
+def parse_options(values, config):
+    """Validate per-request transcription options against the configured allow-lists.
+
+    `values` is any mapping (request.form, a JSON body). Recognised keys are
+    model, language ('auto' to detect), beam_size (1 for greedy), temperature
+    (one value or a comma-separated fallback schedule) and
+    condition_on_previous_text, plus preview to get a quick rough transcript
+    before the full one, and playlist_start, playlist_end (1-based,
+    inclusive) and max_items to take part of a playlist, and start_time and
+    end_time (seconds or [HH:]MM:SS) to transcribe only part of the media.
+    Raises ValueError with a message fit for the client on anything not
+    allowed.
+    """
+    options = default_options(config)
+
+    model_size = values.get('model')
+    if model_size:
+        allowed = get_setting(config, 'ALLOWED_MODEL_SIZES', ['tiny', 'base', 'small'])
+        if model_size not in allowed:
+            raise ValueError(f"Model '{model_size}' is not available. Allowed: {', '.join(allowed)}")
+        options['model_size'] = model_size
+
+    language = values.get('language')
+    if language:
+        language = language.strip().lower()
+        if language == 'auto':
+            options['language'] = None
+        else:
+            language = TO_LANGUAGE_CODE.get(language, language)
+            if language not in LANGUAGES:
+                raise ValueError(f"Unsupported language '{values.get('language')}'")
+            options['language'] = language
+
+    beam_size = values.get('beam_size')
+    if beam_size not in (None, ''):
+        max_beam_size = get_setting(config, 'MAX_BEAM_SIZE', 5)
+        try:
+            beam_size = int(beam_size)
+        except (TypeError, ValueError):
+            raise ValueError("beam_size must be a whole number")
+        if not 1 <= beam_size <= max_beam_size:
+            raise ValueError(f"beam_size must be between 1 and {max_beam_size}")
+        options['beam_size'] = beam_size if beam_size > 1 else None
+
+    temperature = values.get('temperature')
+    if temperature not in (None, ''):
+        parts = temperature if isinstance(temperature, (list, tuple)) else str(temperature).split(',')
+        try:
+            schedule = tuple(float(part) for part in parts)
+        except ValueError:
+            raise ValueError("temperature must be a number or a comma-separated list of numbers")
+        if not 1 <= len(schedule) <= len(DEFAULT_TEMPERATURE) or any(not 0 <= t <= 1 for t in schedule):
+            raise ValueError(
+                f"temperature takes 1 to {len(DEFAULT_TEMPERATURE)} values, each between 0 and 1"
+            )
+        options['temperature'] = schedule
+
+    for name in ('condition_on_previous_text', 'preview'):
+        value = values.get(name)
+        if value in (None, ''):
+            continue
+        if isinstance(value, bool):
+            options[name] = value
+        elif str(value).lower() in ('true', '1', 'yes'):
+            options[name] = True
+        elif str(value).lower() in ('false', '0', 'no'):
+            options[name] = False
+        else:
+            raise ValueError(f"{name} must be true or false")
+
+    for name in ('playlist_start', 'playlist_end', 'max_items'):
+        value = values.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a whole number")
+        if value < 1:
+            raise ValueError(f"{name} must be at least 1")
+        options[name] = value
+    if options['playlist_end'] and options['playlist_end'] < options['playlist_start']:
+        raise ValueError("playlist_end must not be before playlist_start")
+    limit = get_setting(config, 'PLAYLIST_MAX_ITEMS', 0)
+    if limit and options['max_items'] > limit:
+        raise ValueError(f"max_items can be at most {limit}")
+
+    for name in ('start_time', 'end_time'):
+        value = values.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            options[name] = parse_time(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number of seconds or [HH:]MM:SS")
+    if options['start_time'] == 0:
+        options['start_time'] = None
+    if options['end_time'] is not None and options['end_time'] <= (options['start_time'] or 0):
+        raise ValueError("end_time must be after start_time")
+
+    return options
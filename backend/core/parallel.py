@@ -0,0 +1,126 @@
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from whisper.audio import SAMPLE_RATE
+from utils.logger import logger
+
+# Loudness is measured over 100 ms frames when looking for a quiet place to cut
+FRAME_SAMPLES = SAMPLE_RATE // 10
+
+
+def find_chunks(audio, chunk_seconds=300, overlap_seconds=2, search_seconds=10):
+    """Split audio into windows of about chunk_seconds, cutting at the quietest nearby frame.
+
+    Returns a list of (start, end, keep_start, keep_end) sample offsets. Windows
+    overlap by overlap_seconds on each side of a cut; keep_start/keep_end mark
+    the part of the window whose segments survive stitching.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    if total <= chunk:
+        return [(0, total, 0, total)]
+
+    # RMS energy per frame, vectorised over the whole file
+    n_frames = total // FRAME_SAMPLES
+    frames = np.asarray(audio[:n_frames * FRAME_SAMPLES]).reshape(n_frames, FRAME_SAMPLES)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+
+    search = int(search_seconds * SAMPLE_RATE) // FRAME_SAMPLES
+    cuts = []
+    target = chunk
+    while target < total - chunk // 4:
+        center = target // FRAME_SAMPLES
+        lo = max(center - search, 1)
+        hi = min(center + search, n_frames - 1)
+        if hi > lo:
+            cut = (lo + int(np.argmin(energy[lo:hi]))) * FRAME_SAMPLES
+        else:
+            cut = target
+        cuts.append(cut)
+        target = cut + chunk
+
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    bounds = [0] + cuts + [total]
+    return [
+        (
+            max(bounds[i] - overlap, 0),
+            min(bounds[i + 1] + overlap, total),
+            bounds[i],
+            bounds[i + 1]
+        )
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def stitch_segments(chunks, chunk_segments):
+    """Shift each window's segments to the global timeline and drop overlap duplicates.
+
+    A segment belongs to the window whose keep range contains its midpoint, so a
+    sentence decoded twice in an overlap is only kept once.
+    """
+    stitched = []
+    for (start, _, keep_start, keep_end), segments in zip(chunks, chunk_segments):
+        offset = start / SAMPLE_RATE
+        for segment in segments:
+            seg_start = segment['start'] + offset
+            seg_end = segment['end'] + offset
+            midpoint = (seg_start + seg_end) / 2 * SAMPLE_RATE
+            if keep_start <= midpoint < keep_end:
+                stitched.append(dict(segment, id=len(stitched), start=seg_start, end=seg_end))
+    return stitched
+
+
+# Set in each worker process by _init_worker
+_worker_model = None
+_worker_audio = None
+
+
+def _init_worker(model, audio, threads):
+    global _worker_model, _worker_audio
+    # Processes provide the parallelism; keep each one from oversubscribing cores
+    torch.set_num_threads(threads)
+    _worker_model = model
+    _worker_audio = audio
+
+
+def _transcribe_chunk(task):
+    start, end, options = task
+    window = _worker_audio[start:end].numpy()
+    result = _worker_model.transcribe(window, verbose=None, **options)
+    return result['segments']
+
+
+def transcribe_parallel(model, audio, workers, chunk_seconds=300, overlap_seconds=2,
+                        options=None, on_chunk=None):
+    """Transcribe audio in a pool of processes that share the model's weights.
+
+    The model and audio are moved to shared memory and handed to spawned
+    workers once, so each process only holds its own activations. on_chunk is
+    called in timeline order with each window's stitched segments; if it
+    raises (a cancelled job, say), the pool is terminated and the rest of the
+    chunks are dropped.
+    """
+    options = options or {}
+    chunks = find_chunks(audio, chunk_seconds, overlap_seconds)
+    workers = max(1, min(workers, len(chunks)))
+    threads = max(1, torch.get_num_threads() // workers)
+    logger.info(f"Transcribing {len(chunks)} chunks with {workers} processes ({threads} threads each)")
+
+    # Parameters only: Whisper keeps alignment_heads as a sparse buffer, which can't be shared
+    for parameter in model.parameters():
+        parameter.share_memory_()
+    shared_audio = torch.from_numpy(np.ascontiguousarray(audio)).share_memory_()
+
+    ctx = mp.get_context('spawn')
+    segments = []
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(model, shared_audio, threads)) as pool:
+        tasks = [(start, end, options) for start, end, _, _ in chunks]
+        for chunk, chunk_segments in zip(chunks, pool.imap(_transcribe_chunk, tasks)):
+            new_segments = stitch_segments([chunk], [chunk_segments])
+            for segment in new_segments:
+                segment['id'] = len(segments)
+                segments.append(segment)
+            if on_chunk:
+                on_chunk(new_segments)
+
+    return segments
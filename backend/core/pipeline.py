@@ -0,0 +1,77 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from utils.logger import logger
+
+
+def prefetch(items, fn, workers=2, ahead=2, discard=None):
+    """Yield (item, result, error) in input order while fn runs ahead on later items.
+
+    fn runs on a thread pool for at most `ahead` items beyond the one the caller
+    is currently handling, so I/O-bound work (downloads) overlaps with whatever
+    the caller does with each result (transcription) without piling up.
+
+    If the caller stops early, queued calls are cancelled and `discard` is
+    called with the result of any call that finished but was never consumed,
+    so it can clean up files.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='prefetch')
+    pending = deque()
+    iterator = iter(items)
+
+    def fill():
+        # The item about to be handed out plus `ahead` more
+        while len(pending) < ahead + 1:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            pending.append((item, executor.submit(fn, item)))
+
+    try:
+        while True:
+            fill()
+            if not pending:
+                break
+            item, future = pending.popleft()
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            yield item, result, error
+
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for item, future in pending:
+            if discard and future.done() and not future.cancelled() and future.exception() is None:
+                try:
+                    discard(future.result())
+                except Exception as e:
+                    logger.error(f"Error discarding prefetched result: {e}")
+
+
+class MemoryBudget:
+    """Weighted semaphore bounding how many bytes of work are in flight at once.
+
+    A reservation larger than the whole budget is capped to it, so one big
+    item still runs, just on its own.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._available = threading.Condition()
+
+    @contextmanager
+    def reserve(self, amount):
+        amount = min(amount, self.limit)
+        with self._available:
+            self._available.wait_for(lambda: self.in_use + amount <= self.limit)
+            self.in_use += amount
+        try:
+            yield
+        finally:
+            with self._available:
+                self.in_use -= amount
+                self._available.notify_all()
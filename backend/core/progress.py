@@ -1,28 +1,201 @@
+import threading
+from collections import OrderedDict
 from utils.logger import logger
 
+FINISHED_STATUSES = ('complete', 'error', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised between units of work (windows, chunks, downloads) once a job is cancelled"""
+
 class ProgressTracker:
-    def __init__(self):
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.version = 0
         self.reset()
 
     def reset(self):
-        self.current_progress = {
-            'status': 'idle',
-            'message': '',
-            'progress': 0,
-            'current_text': '',
-            'segments': []
-        }
-
-    def update(self, message, progress=None, segment=None, **kwargs):
-        self.current_progress['message'] = message
-        if progress is not None:
-            self.current_progress['progress'] = progress
-        if segment is not None:
-            self.current_progress['segments'].append(segment)
+        with self._lock:
+            self.current_progress = {
+                'job_id': self.job_id,
+                'status': 'idle',
+                'message': '',
+                'progress': 0,
+                'current_text': '',
+                'segments': []
+            }
+            self._bump()
+
+    def update(self, message, progress=None, segment=None, status=None, **kwargs):
+        with self._lock:
+            # A cancelled job keeps running until its current step finishes;
+            # don't let it overwrite the cancelled state in the meantime
+            if self.current_progress['status'] == 'cancelled':
+                return
+
+            self.current_progress['message'] = message
+            if progress is not None:
+                self.current_progress['progress'] = progress
+            if segment is not None:
+                self.current_progress['segments'].append(segment)
+            if status is not None:
+                self.current_progress['status'] = status
+            elif self.current_progress['status'] == 'idle':
+                self.current_progress['status'] = 'processing'
+            self._bump()
 
         # Log any unexpected keyword arguments
         if kwargs:
             logger.warning(f"Unexpected arguments passed to update: {kwargs}")
 
+    def cancel(self):
+        with self._lock:
+            if self.current_progress['status'] in FINISHED_STATUSES:
+                return
+            self.current_progress['status'] = 'cancelled'
+            self.current_progress['message'] = 'Transcription canceled'
+            self._bump()
+
+    def _bump(self):
+        # Caller holds the lock
+        self.version += 1
+        self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout=None):
+        """Block until the tracker moves past `version`; returns the current version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def get_delta(self, cursor=0):
+        """Current status fields plus only the segments after `cursor`.
+
+        The returned 'cursor' is what the client passes next time; segments are
+        append-only, so it is simply how many segments the client now has.
+        """
+        with self._lock:
+            segments = self.current_progress['segments']
+            if cursor < 0 or cursor > len(segments):
+                cursor = 0
+            delta = {key: value for key, value in self.current_progress.items() if key != 'segments'}
+            delta['segments'] = segments[cursor:]
+            delta['segment_offset'] = cursor
+            delta['cursor'] = len(segments)
+            return delta
+
+    @property
+    def cancelled(self):
+        return self.current_progress['status'] == 'cancelled'
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled("Job was cancelled")
+
+    @property
+    def finished(self):
+        return self.current_progress['status'] in FINISHED_STATUSES
+
     def get_progress(self):
-        return self.current_progress
\ No newline at end of file
+        # Copy under the lock so callers can serialize it while the job keeps updating
+        with self._lock:
+            snapshot = dict(self.current_progress)
+            snapshot['segments'] = list(self.current_progress['segments'])
+            return snapshot
+
+
+class ProgressRegistry:
+    """Holds one ProgressTracker per job, forgetting the oldest finished jobs past max_jobs"""
+
+    def __init__(self, max_jobs=100):
+        self.max_jobs = max_jobs
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job_id):
+        tracker = ProgressTracker(job_id)
+        with self._lock:
+            self._trackers[job_id] = tracker
+            self._prune()
+        return tracker
+
+    def get(self, job_id):
+        with self._lock:
+            return self._trackers.get(job_id)
+
+    def latest(self):
+        with self._lock:
+            if not self._trackers:
+                return None
+            return next(reversed(self._trackers.values()))
+
+    def _prune(self):
+        excess = len(self._trackers) - self.max_jobs
+        for job_id in list(self._trackers):
+            if excess <= 0:
+                break
+            if self._trackers[job_id].finished:
+                del self._trackers[job_id]
+                excess -= 1
+
+
+class ProgressAggregator:
+    """Combines the progress of several parts of one job into the job's overall progress.
+
+    Each part reports 0-100 through its own PartProgress; the job's tracker
+    shows the mean across parts, mapped into [start, end].
+    """
+
+    def __init__(self, tracker, parts, start=0, end=100):
+        self.tracker = tracker
+        self.start = start
+        self.end = end
+        self._parts = [0] * parts
+        self._lock = threading.Lock()
+
+    def part(self, index, label='', scale=(0, 100)):
+        return PartProgress(self, index, label, scale)
+
+    def complete(self, index):
+        self._set(index, 100)
+
+    def grow(self, parts):
+        """Make room for at least `parts` parts, for jobs that only learn their size as they go"""
+        with self._lock:
+            if parts > len(self._parts):
+                self._parts.extend([0] * (parts - len(self._parts)))
+
+    def _set(self, index, progress):
+        with self._lock:
+            self._parts[index] = max(0, min(progress, 100))
+            return self.start + (self.end - self.start) * sum(self._parts) / (100 * len(self._parts))
+
+
+class PartProgress:
+    """ProgressTracker stand-in handed to AudioProcessor/Transcriber for one part of a job.
+
+    `scale` maps the 0-100 the component reports into a sub-range of the part,
+    e.g. a download reporting 0-100 can be made to fill only the first 30%.
+    Segments are passed through; status changes stay with the job's handler.
+    """
+
+    def __init__(self, aggregator, index, label, scale):
+        self.aggregator = aggregator
+        self.index = index
+        self.label = label
+        self.scale = scale
+
+    def update(self, message, progress=None, segment=None, status=None, **kwargs):
+        overall = None
+        if progress is not None:
+            low, high = self.scale
+            overall = self.aggregator._set(self.index, low + (high - low) * progress / 100)
+        self.aggregator.tracker.update(f"{self.label}{message}", overall, segment=segment, **kwargs)
+
+    @property
+    def cancelled(self):
+        return self.aggregator.tracker.cancelled
+
+    def check_cancelled(self):
+        self.aggregator.tracker.check_cancelled()
@@ -0,0 +1,181 @@
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.settings import get_setting
+from utils.logger import logger
+
+# PROXY_LIST entry meaning "connect without a proxy"
+DIRECT = 'direct'
+
+
+class ProxyHealth:
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.latency = None      # EWMA of successful probe times, seconds
+        self.failures = 0        # consecutive failures
+        self.open_until = 0      # circuit open (proxy skipped) until this monotonic time
+        self.checked_at = None
+        self.probing = False
+
+
+class ProxyManager:
+    """Keeps a latency and failure record per proxy so downloads start on one that works.
+
+    Proxies whose health is unknown or older than probe_interval are probed
+    concurrently with a short timeout, and ranked() returns as soon as the
+    first one answers rather than after every dead proxy has timed out. Each
+    successful probe updates the proxy's latency EWMA; failure_threshold
+    failures in a row open its circuit for cooldown seconds, after which it
+    is probed again before being used.
+    """
+
+    def __init__(self, proxies, probe_url, probe_timeout=5, probe_interval=300,
+                 failure_threshold=2, cooldown=300, alpha=0.3):
+        self.probe_url = probe_url
+        self.probe_timeout = probe_timeout
+        self.probe_interval = probe_interval
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._health = {proxy: ProxyHealth(proxy) for proxy in proxies}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(len(self._health), 8)),
+            thread_name_prefix='proxy-probe'
+        )
+
+    @staticmethod
+    def ydl_proxy(proxy):
+        """The value for yt-dlp's 'proxy' option; an empty string means a direct connection"""
+        return '' if proxy == DIRECT else proxy
+
+    def probe(self, proxy):
+        """Time one request for probe_url through proxy; raises on failure"""
+        handler = urllib.request.ProxyHandler({} if proxy == DIRECT else {'http': proxy, 'https': proxy})
+        opener = urllib.request.build_opener(handler)
+        started = time.monotonic()
+        with opener.open(self.probe_url, timeout=self.probe_timeout) as response:
+            response.read(1024)
+        return time.monotonic() - started
+
+    def _probe(self, proxy):
+        try:
+            latency = self.probe(proxy)
+        except Exception as e:
+            logger.info(f"Proxy {proxy} failed probe: {str(e)}")
+            self.record_failure(proxy)
+            return None
+        finally:
+            with self._lock:
+                self._health[proxy].probing = False
+        self.record_success(proxy, latency)
+        return latency
+
+    def record_success(self, proxy, latency=None):
+        with self._lock:
+            health = self._health.get(proxy)
+            if health is None:
+                return
+            if latency is not None:
+                if health.latency is None:
+                    health.latency = latency
+                else:
+                    health.latency = self.alpha * latency + (1 - self.alpha) * health.latency
+                health.checked_at = time.monotonic()
+            health.failures = 0
+            health.open_until = 0
+
+    def record_failure(self, proxy):
+        with self._lock:
+            health = self._health.get(proxy)
+            if health is None:
+                return
+            health.failures += 1
+            health.checked_at = time.monotonic()
+            if health.failures >= self.failure_threshold:
+                health.open_until = time.monotonic() + self.cooldown
+                logger.warning(f"Proxy {proxy} failed {health.failures} times in a row, "
+                               f"skipping it for {self.cooldown}s")
+
+    def _healthy(self, now):
+        """Proxies with a fresh successful probe and a closed circuit, fastest first"""
+        healthy = [
+            health for health in self._health.values()
+            if health.latency is not None and health.failures == 0 and health.open_until <= now
+            and now - health.checked_at < self.probe_interval
+        ]
+        return [health.proxy for health in sorted(healthy, key=lambda health: health.latency)]
+
+    def _start_probes(self, now):
+        """Probe every proxy that is stale and not circuit-broken; returns the futures"""
+        futures = []
+        with self._lock:
+            for health in self._health.values():
+                if health.probing or health.open_until > now:
+                    continue
+                if health.checked_at is not None and now - health.checked_at < self.probe_interval:
+                    continue
+                health.probing = True
+                futures.append(self._executor.submit(self._probe, health.proxy))
+        return futures
+
+    def ranked(self):
+        """Proxies to try in order, fastest healthy one first.
+
+        When nothing is known to work yet, waits only until the first
+        concurrent probe succeeds; the other probes finish in the background
+        and count towards the next call. Proxies still unprobed or cooling
+        down come last, so a download is attempted even if every probe failed.
+        """
+        now = time.monotonic()
+        futures = self._start_probes(now)
+        with self._lock:
+            healthy = self._healthy(now)
+        if not healthy and futures:
+            for future in as_completed(futures):
+                if future.result() is not None:
+                    break
+            now = time.monotonic()
+            with self._lock:
+                healthy = self._healthy(now)
+
+        with self._lock:
+            rest = sorted(
+                (health for health in self._health.values() if health.proxy not in healthy),
+                key=lambda health: (health.open_until > now, health.failures)
+            )
+        return healthy + [health.proxy for health in rest]
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'proxy': health.proxy,
+                    'latency_ms': round(health.latency * 1000) if health.latency is not None else None,
+                    'failures': health.failures,
+                    'circuit_open': health.open_until > now
+                }
+                for health in self._health.values()
+            ]
+
+
+_shared_proxy_manager = None
+_shared_proxy_manager_lock = threading.Lock()
+
+
+def get_proxy_manager(config=None):
+    """Process-wide proxy manager for PROXY_LIST, so proxy health carries over between jobs"""
+    global _shared_proxy_manager
+    with _shared_proxy_manager_lock:
+        if _shared_proxy_manager is None:
+            _shared_proxy_manager = ProxyManager(
+                get_setting(config, 'PROXY_LIST', None) or [DIRECT],
+                get_setting(config, 'PROXY_PROBE_URL', 'https://www.youtube.com/generate_204'),
+                probe_timeout=get_setting(config, 'PROXY_PROBE_TIMEOUT', 5),
+                probe_interval=get_setting(config, 'PROXY_PROBE_INTERVAL', 300),
+                failure_threshold=get_setting(config, 'PROXY_FAILURE_THRESHOLD', 2),
+                cooldown=get_setting(config, 'PROXY_COOLDOWN', 300)
+            )
+        return _shared_proxy_manager
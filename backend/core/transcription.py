@@ -1,13 +1,27 @@
-import whisper
 from datetime import datetime
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+from whisper.audio import N_SAMPLES, SAMPLE_RATE
+from config.settings import get_setting
+from core.audio import PcmCache, SpeechTimeline, decode_audio, detect_speech, pcm_bytes, probe_duration
+from core.batching import transcribe_batch
+from core.model_pool import get_model_pool
+from core.cache import file_sha256, get_transcript_cache
+from core.engines import get_engine
+from core.options import default_options
+from core.progress import JobCancelled
+from core.parallel import transcribe_parallel
 from utils.logger import logger
 import traceback
 
 class Transcriber:
-    def __init__(self, config, progress_tracker):
+    def __init__(self, config, progress_tracker, options=None):
+        """`options` are a job's choices as returned by core.options.parse_options"""
         self.config = config
         self.progress = progress_tracker
+        options = options or default_options(config)
         
         # Determine transcripts folder
         # Look for TRANSCRIPTS_FOLDER in multiple ways
@@ -20,9 +34,59 @@ class Transcriber:
         
         # Ensure the transcripts folder exists
         os.makedirs(self.transcripts_folder, exist_ok=True)
+
+        self.model_size = options['model_size']
+        # None means detect the language
+        self.language = options['language']
+        self.decode_options = {
+            'beam_size': options['beam_size'],
+            'temperature': tuple(options['temperature']),
+            'condition_on_previous_text': options['condition_on_previous_text']
+        }
+        self.preview = options.get('preview', False)
+        # Only this part of the media is transcribed; timestamps stay relative to the whole
+        self.start_time = options.get('start_time')
+        self.end_time = options.get('end_time')
+        self.time_offset = self.start_time or 0
+        self.preview_model_size = get_setting(config, 'PREVIEW_MODEL_SIZE', 'tiny')
+        self.preview_max_seconds = get_setting(config, 'PREVIEW_MAX_SECONDS', 0)
+        self.device = get_setting(config, 'WHISPER_DEVICE', 'cpu')
+        self.engine = get_engine(get_setting(config, 'TRANSCRIBE_ENGINE', 'whisper'))
+        self.model_pool = get_model_pool(config)
+        self.streaming = get_setting(config, 'TRANSCRIBE_STREAMING', True)
+        self.parallel_workers = get_setting(config, 'PARALLEL_WORKERS', 1)
+        self.parallel_min_duration = get_setting(config, 'PARALLEL_MIN_DURATION', 600)
+        self.parallel_chunk_seconds = get_setting(config, 'PARALLEL_CHUNK_SECONDS', 300)
+        self.parallel_overlap_seconds = get_setting(config, 'PARALLEL_OVERLAP_SECONDS', 2)
+        self.batch_size = get_setting(config, 'BATCH_SIZE', 8)
+        self.batch_max_seconds = get_setting(config, 'BATCH_MAX_SECONDS', 120)
+        self.decode_workers = get_setting(config, 'UPLOAD_WORKERS', 2)
+        self.cache = get_transcript_cache(config)
+        # Inputs this large are decoded to a memory-mapped file in TEMP_FOLDER
+        self.pcm_mmap_min_bytes = get_setting(config, 'PCM_MMAP_MIN_BYTES', 20 * 1024 * 1024)
+        self.pcm_cache = PcmCache(
+            get_setting(config, 'TEMP_FOLDER', 'temp_audio'),
+            max_bytes=get_setting(config, 'PCM_CACHE_MAX_BYTES', 4 * 1024 * 1024 * 1024)
+        )
+        self.vad = get_setting(config, 'VAD_ENABLED', True)
+        self.vad_min_silence = get_setting(config, 'VAD_MIN_SILENCE_SECONDS', 2.0)
+        # Set by transcribe_audio so handlers can report whether the cache answered
+        # and how much silence was skipped
+        self.cache_hit = False
+        self.vad_stats = None
+        self._timeline = None
         
-    def transcribe_audio(self, audio_file, source_info=""):
-        """Transcribe audio file using Whisper"""
+    def transcribe_audio(self, audio_file, source_info="", audio=None, on_preview=None, clipped=False):
+        """Transcribe audio file using Whisper.
+
+        `audio` is the file already decoded by decode_audio, for callers that
+        need the samples for something else too; otherwise it's decoded here.
+        When the job asked for a preview, on_preview is called with a rough
+        {'text', 'segments', 'model_size'} transcript from PREVIEW_MODEL_SIZE
+        before the full pass starts. With a start_time/end_time option only
+        that range is decoded, unless `clipped` says the file (or `audio`)
+        already holds just that range, as a section download does.
+        """
         try:
             logger.info(f"Starting transcription of: {audio_file}")
             self.progress.update("Loading Whisper model...", 30)
@@ -34,58 +98,443 @@ class Transcriber:
             file_size = os.path.getsize(audio_file)
             logger.info(f"File size: {file_size} bytes")
 
-            model = whisper.load_model("base", device="cpu")
+            self.cache_hit = False
+            self.vad_stats = None
+            self._timeline = None
+            seek = audio is None and not clipped and self._has_time_range()
+            use_mmap = audio is None and not seek and file_size >= self.pcm_mmap_min_bytes
+            audio_hash = file_sha256(audio_file) if self.cache or use_mmap else None
+            cache_key = None
+            result = None
+            if self.cache:
+                cache_key = self.cache.make_key(audio_hash, self._cache_settings())
+                result = self.cache.get(cache_key)
+
+            if result is not None:
+                logger.info(f"Transcript cache hit for {audio_file}")
+                self.cache_hit = True
+                for segment in result['segments']:
+                    self._publish_segment(segment, result['segments'][-1]['end'], original=True)
+            else:
+                self.progress.check_cancelled()
+                if audio is None:
+                    if seek:
+                        audio = decode_audio(audio_file, start=self.start_time, end=self.end_time)
+                    elif use_mmap:
+                        audio = self.pcm_cache.load(audio_file, audio_hash)
+                    else:
+                        audio = decode_audio(audio_file)
+                if self.vad:
+                    audio = self._skip_silence(audio)
+                if on_preview and self.preview and self.preview_model_size != self.model_size:
+                    on_preview(self._transcribe_preview(audio))
+                    self.progress.check_cancelled()
+                result = self._transcribe(audio)
+                if self._timeline or self.time_offset:
+                    result['segments'] = [self._to_original(segment) for segment in result['segments']]
+                if cache_key:
+                    self.cache.put(cache_key, {
+                        'text': result['text'],
+                        'language': result.get('language'),
+                        'segments': [
+                            {'id': seg['id'], 'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+                            for seg in result['segments']
+                        ]
+                    })
+
+            transcript_file = self._save_transcript(audio_file, source_info, result["text"])
+            return transcript_file, result["text"]
+
+        except JobCancelled:
+            logger.info(f"Transcription of {audio_file} stopped: job was cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Transcription error: {str(e)}")
+            logger.error(traceback.format_exc())
+            self.progress.update(f"Error in transcription: {str(e)}")
+            return None, None
+
+    def transcribe_batch(self, audio_files, source_infos=None, budget=None):
+        """Transcribe several short files together, with batched encoder and decoder passes.
+
+        Files up to BATCH_MAX_SECONDS are cut into 30-second windows that are
+        stacked BATCH_SIZE at a time (see core.batching). Returns one entry
+        per file: a dict with transcript_file, text, cached and vad, or None
+        where the file is too long or failed, for the caller to transcribe
+        with transcribe_audio. No preview pass is made for batched files.
+
+        The batch holds every file's samples at once, so with a MemoryBudget
+        it takes only the files that fit in the budget and reserves their
+        decoded size while it runs; the rest are left to the caller.
+        """
+        source_infos = source_infos or [""] * len(audio_files)
+        entries = [None] * len(audio_files)
+        if self.batch_size <= 1 or not self.engine.supports_batching:
+            return entries
+        # (index, cache key) per file the cache didn't answer
+        candidates = []
+        reserved = 0
+        for index, audio_file in enumerate(audio_files):
+            try:
+                if not self._has_time_range() and os.path.getsize(audio_file) >= self.pcm_mmap_min_bytes:
+                    continue
+                cache_key = None
+                if self.cache:
+                    cache_key = self.cache.make_key(file_sha256(audio_file), self._cache_settings())
+                    result = self.cache.get(cache_key)
+                    if result is not None:
+                        logger.info(f"Transcript cache hit for {audio_file}")
+                        entries[index] = {
+                            'transcript_file': self._save_transcript(audio_file, source_infos[index], result['text']),
+                            'text': result['text'],
+                            'cached': True,
+                            'vad': None
+                        }
+                        continue
+
+                # Decoding stops just past BATCH_MAX_SECONDS, so that bounds a file's samples
+                seconds = self.batch_max_seconds + 1
+                if not self._has_time_range():
+                    duration = probe_duration(audio_file)
+                    if duration and duration > self.batch_max_seconds:
+                        logger.info(f"Not batching {audio_file}: longer than {self.batch_max_seconds}s")
+                        continue
+                    seconds = min(duration or seconds, seconds)
+                footprint = pcm_bytes(seconds)
+                if budget is not None and reserved + footprint > budget.limit:
+                    logger.info(f"Not batching {audio_file}: the batch already fills the memory budget")
+                    continue
+                reserved += footprint
+                candidates.append((index, cache_key))
+            except Exception as e:
+                logger.error(f"Not batching {audio_file}: {str(e)}")
+                logger.error(traceback.format_exc())
+
+        if not candidates:
+            return entries
+
+        with budget.reserve(reserved) if budget is not None else nullcontext():
+            # ffmpeg runs in its own process, so files are decoded side by side
+            with ThreadPoolExecutor(max_workers=max(1, self.decode_workers), thread_name_prefix='batch-decode') as executor:
+                decoded = list(executor.map(lambda candidate: self._decode_for_batch(audio_files[candidate[0]]), candidates))
+
+            # (index, cache key, audio, speech timeline, vad stats) per file to transcribe
+            pending = []
+            for (index, cache_key), audio in zip(candidates, decoded):
+                if audio is None:
+                    continue
+                self._timeline = None
+                self.vad_stats = None
+                if self.vad:
+                    audio = self._skip_silence(audio)
+                pending.append((index, cache_key, audio, self._timeline, self.vad_stats))
+            self._timeline = None
+            self.vad_stats = None
+
+            if not pending:
+                return entries
+
+            try:
+                logger.info(f"Batch transcribing {len(pending)} files, {self.batch_size} windows at a time")
+                self.progress.update(f"Transcribing {len(pending)} short files together...")
+                with self.model_pool.acquire(self.model_size, self.device, self.engine.name) as model:
+                    results = transcribe_batch(
+                        model,
+                        [audio for _, _, audio, _, _ in pending],
+                        language=self.language,
+                        beam_size=self.decode_options['beam_size'],
+                        temperature=self.decode_options['temperature'],
+                        batch_size=self.batch_size,
+                        on_batch=lambda done, total: self._batch_progress(len(pending), done, total)
+                    )
+            except JobCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Batch transcription error: {str(e)}")
+                logger.error(traceback.format_exc())
+                return entries
+
+        for (index, cache_key, _, timeline, vad_stats), result in zip(pending, results):
+            audio_file = audio_files[index]
+            try:
+                if timeline or self.time_offset:
+                    result['segments'] = [self._to_original(segment, timeline) for segment in result['segments']]
+                for segment in result['segments']:
+                    self._publish_segment(segment, original=True)
+                if cache_key:
+                    self.cache.put(cache_key, {
+                        'text': result['text'],
+                        'language': result['language'],
+                        'segments': [
+                            {'id': seg['id'], 'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+                            for seg in result['segments']
+                        ]
+                    })
+                entries[index] = {
+                    'transcript_file': self._save_transcript(audio_file, source_infos[index], result['text']),
+                    'text': result['text'],
+                    'cached': False,
+                    'vad': vad_stats
+                }
+            except Exception as e:
+                logger.error(f"Error saving batched transcript for {audio_file}: {str(e)}")
+                logger.error(traceback.format_exc())
+
+        return entries
+
+    def _batch_progress(self, files, done, total):
+        self.progress.update(f"Transcribing {files} short files together ({done}/{total} windows)...")
+        self.progress.check_cancelled()
+
+    def _decode_for_batch(self, audio_file):
+        """Decode audio_file for the batch pass, or None if it's too long or fails.
+
+        Decoding stops just past BATCH_MAX_SECONDS, so a long file costs a
+        couple of minutes of samples to turn away rather than all of them.
+        """
+        limit = (self.start_time or 0) + self.batch_max_seconds + 1
+        end = limit if self.end_time is None else min(self.end_time, limit)
+        try:
+            audio = decode_audio(audio_file, start=self.start_time, end=end)
+        except Exception as e:
+            logger.error(f"Not batching {audio_file}: {str(e)}")
+            return None
+        if len(audio) > self.batch_max_seconds * SAMPLE_RATE:
+            logger.info(f"Not batching {audio_file}: longer than {self.batch_max_seconds}s")
+            return None
+        return audio
+
+    def _save_transcript(self, audio_file, source_info, text):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_name = os.path.splitext(os.path.basename(audio_file))[0]
+
+        # Ensure transcripts folder exists
+        os.makedirs(self.transcripts_folder, exist_ok=True)
+        
+        transcript_file = os.path.join(
+            self.transcripts_folder, 
+            f"{timestamp}_{base_name}_transcript.txt"
+        )
+        
+        logger.info(f"Attempting to save transcript to: {transcript_file}")
+        
+        with open(transcript_file, "w", encoding="utf-8") as f:
+            if source_info:
+                f.write(f"Source: {source_info}\n\n")
+            f.write(text)
+        
+        logger.info(f"Transcript saved successfully to: {transcript_file}")
+        return transcript_file
+
+    def _skip_silence(self, audio):
+        """Cut long silences out of audio before decoding; segments are mapped back by _to_original"""
+        regions = detect_speech(audio, min_silence_seconds=self.vad_min_silence)
+        speech = sum(end - start for start, end in regions)
+        self.vad_stats = {
+            'total_seconds': round(len(audio) / SAMPLE_RATE, 2),
+            'speech_seconds': round(speech / SAMPLE_RATE, 2),
+            'skipped_seconds': round((len(audio) - speech) / SAMPLE_RATE, 2),
+            'regions': len(regions)
+        }
+        logger.info(f"Voice activity: {self.vad_stats}")
+
+        # Not worth a copy of the audio for less than a second of silence. Memory-mapped
+        # recordings come back as a CondensedAudio view, read a window at a time
+        if len(audio) - speech < SAMPLE_RATE:
+            return audio
+        self._timeline = SpeechTimeline(regions)
+        return self._timeline.condense(audio)
+
+    def _has_time_range(self):
+        return bool(self.start_time) or self.end_time is not None
+
+    def _to_original(self, segment, timeline=None):
+        """Map a segment from the decoded audio's timeline to the original media's"""
+        timeline = timeline or self._timeline
+        start, end = segment['start'], segment['end']
+        if timeline:
+            start = timeline.to_original(start)
+            end = timeline.to_original(end, end=True)
+        return dict(segment, start=start + self.time_offset, end=end + self.time_offset)
+
+    def _transcribe(self, audio):
+        duration = len(audio) / SAMPLE_RATE
+        if duration == 0:
+            # Nothing but silence
+            return {'text': '', 'segments': [], 'language': self.language}
+
+        with self.model_pool.acquire(self.model_size, self.device, self.engine.name) as model:
             self.progress.update("Starting transcription...", 40)
-            
-            result = model.transcribe(
-                audio_file,
+
+            if self.engine.supports_parallel and self.parallel_workers > 1 \
+                    and duration >= self.parallel_min_duration:
+                return self._transcribe_parallel(model, audio)
+            if self.streaming:
+                return self._transcribe_streaming(model, audio)
+
+            # Whole-file decoding needs one array; a condensed recording is joined here
+            result = self.engine.transcribe(
+                model,
+                np.asarray(audio),
+                language=self.language,
                 verbose=True,
-                language='en',
-                fp16=False
+                **self.decode_options
             )
 
-            # Process segments
+            # Replay segments once the whole file is done
             for segment in result['segments']:
-                start = f"{int(segment['start'] // 60):02d}:{segment['start'] % 60:06.3f}"
-                end = f"{int(segment['end'] // 60):02d}:{segment['end'] % 60:06.3f}"
-                
-                self.progress.update(
-                    "Transcribing...", 
-                    progress=40 + (segment['end'] / result['segments'][-1]['end']) * 50,
-                    segment={
-                        'start': start,
-                        'end': end,
-                        'text': segment['text'].strip()
-                    }
-                )
+                self._publish_segment(segment, result['segments'][-1]['end'])
+            return result
 
-            # Save transcript
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            base_name = os.path.splitext(os.path.basename(audio_file))[0]
+    def _transcribe_preview(self, audio):
+        """Greedy pass with the small preview model, over the first PREVIEW_MAX_SECONDS if set"""
+        if self.preview_max_seconds:
+            audio = audio[:int(self.preview_max_seconds * SAMPLE_RATE)]
+        if len(audio) == 0:
+            return {'text': '', 'segments': [], 'model_size': self.preview_model_size}
 
+        self.progress.update("Transcribing quick preview...", 35)
+        with self.model_pool.acquire(self.preview_model_size, self.device, self.engine.name) as model:
+            result = self.engine.transcribe(
+                model,
+                np.asarray(audio),
+                language=self.language,
+                temperature=(0.0,),
+                condition_on_previous_text=self.decode_options['condition_on_previous_text']
+            )
 
-            # Ensure transcripts folder exists
-            os.makedirs(self.transcripts_folder, exist_ok=True)
-            
-            transcript_file = os.path.join(
-                self.transcripts_folder, 
-                f"{timestamp}_{base_name}_transcript.txt"
+        segments = result['segments']
+        if self._timeline or self.time_offset:
+            segments = [self._to_original(segment) for segment in segments]
+        self.progress.update("Preview ready, refining transcript...", 40)
+        return {
+            'text': result['text'],
+            'segments': [
+                {'start': segment['start'], 'end': segment['end'], 'text': segment['text'].strip()}
+                for segment in segments
+            ],
+            'model_size': self.preview_model_size
+        }
+
+    def _cache_settings(self):
+        """Everything besides the audio that changes the transcript"""
+        settings = {
+            'engine': self.engine.name,
+            'model_size': self.model_size,
+            'language': self.language,
+            'fp16': False,
+            'decode_options': self.decode_options,
+            'streaming': self.streaming,
+            'vad_min_silence': self.vad_min_silence if self.vad else None
+        }
+        # Only when set, so whole-file entries keep their keys
+        if self._has_time_range():
+            settings['time_range'] = [self.start_time, self.end_time]
+        return settings
+
+    def _transcribe_streaming(self, model, audio):
+        """Decode one 30-second window at a time, publishing segments as each window finishes.
+
+        The last segment of a window may be cut off mid-sentence, so unless it is
+        the final window we drop it and start the next window where it began.
+        The text decoded so far is passed as the prompt to keep context across
+        windows, unless condition_on_previous_text is off. With language
+        detection, the first window's language is used for the rest.
+        """
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        offset = 0
+        language = self.language
+
+        while offset < len(audio):
+            self.progress.check_cancelled()
+            window = audio[offset:offset + N_SAMPLES]
+            is_last_window = offset + N_SAMPLES >= len(audio)
+            prompt = None
+            if self.decode_options['condition_on_previous_text']:
+                prompt = ''.join(segment['text'] for segment in segments[-8:]) or None
+
+            window_result = self.engine.transcribe(
+                model,
+                window,
+                language=language,
+                initial_prompt=prompt,
+                **self.decode_options
             )
-            
-            logger.info(f"Attempting to save transcript to: {transcript_file}")
-            
-            with open(transcript_file, "w", encoding="utf-8") as f:
-                if source_info:
-                    f.write(f"Source: {source_info}\n\n")
-                f.write(result["text"])
-            
-            logger.info(f"Transcript saved successfully to: {transcript_file}")
-            
-            return transcript_file, result["text"]
-            
-        except Exception as e:
-            logger.error(f"Transcription error: {str(e)}")
-            logger.error(traceback.format_exc())
-            self.progress.update(f"Error in transcription: {str(e)}")
-            return None, None
+            window_segments = window_result['segments']
+            language = language or window_result.get('language')
+
+            if not is_last_window and len(window_segments) > 1:
+                window_segments = window_segments[:-1]
+                advance = int(window_segments[-1]['end'] * SAMPLE_RATE)
+            else:
+                advance = len(window)
+
+            window_start = offset / SAMPLE_RATE
+            for segment in window_segments:
+                segment = dict(
+                    segment,
+                    id=len(segments),
+                    start=segment['start'] + window_start,
+                    end=segment['end'] + window_start
+                )
+                segments.append(segment)
+                self._publish_segment(segment, duration)
+
+            # Always move forward, even if the window produced no usable segment
+            offset += max(advance, SAMPLE_RATE)
+
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': language
+        }
+
+    def _transcribe_parallel(self, model, audio):
+        """Transcribe long audio as silence-aligned chunks spread over PARALLEL_WORKERS processes"""
+        duration = len(audio) / SAMPLE_RATE
+
+        def publish(segments):
+            for segment in segments:
+                self._publish_segment(segment, duration)
+            # Raising here leaves transcribe_parallel, which terminates the pool
+            self.progress.check_cancelled()
+
+        segments = transcribe_parallel(
+            model,
+            audio,
+            workers=self.parallel_workers,
+            chunk_seconds=self.parallel_chunk_seconds,
+            overlap_seconds=self.parallel_overlap_seconds,
+            options=dict(self.decode_options, language=self.language, fp16=False),
+            on_chunk=publish
+        )
+
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': self.language
+        }
+
+    def _publish_segment(self, segment, duration=None, original=False):
+        # Progress is measured on the audio being decoded, timestamps on the original
+        # (which `original` segments, like cached ones, already are). Without a
+        # duration (batched files) only the segment is sent.
+        progress = None
+        if duration is not None:
+            progress = 40 + min(segment['end'] / duration, 1) * 50 if duration else 90
+        if not original and (self._timeline or self.time_offset):
+            segment = self._to_original(segment)
+        start = f"{int(segment['start'] // 60):02d}:{segment['start'] % 60:06.3f}"
+        end = f"{int(segment['end'] // 60):02d}:{segment['end'] % 60:06.3f}"
+
+        self.progress.update(
+            "Transcribing...",
+            progress=progress,
+            segment={
+                'start': start,
+                'end': end,
+                'text': segment['text'].strip()
+            }
+        )
 
@@ -1,3 +1,13 @@
-bind = "0.0.0.0:10000"
-workers = 2
-timeout = 120
\ No newline at end of file
+import os
+
+# App Platform passes the port to listen on in PORT
+bind = f"0.0.0.0:{os.getenv('PORT', 10000)}"
+# Jobs, their results and the loaded models live in the worker's memory,
+# so run a single worker and serve concurrent requests from threads.
+workers = 1
+worker_class = "gthread"
+# An open progress stream holds one of these threads until its job ends.
+# PROGRESS_STREAM_MAX (4 by default) caps them so the rest stay free for
+# /api/process and polling; raise both together to allow more live streams.
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = 120
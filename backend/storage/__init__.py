@@ -1,4 +1,5 @@
+from .background import BackgroundUploader
 from .firebase import FirebaseStorage
 from .local import LocalStorage
 
-__all__ = ['FirebaseStorage', 'LocalStorage']
\ No newline at end of file
+__all__ = ['BackgroundUploader', 'FirebaseStorage', 'LocalStorage']
\ No newline at end of file
@@ -0,0 +1,66 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import logger
+
+
+class BackgroundUploader:
+    """Archives local files to a storage backend off the request's critical path.
+
+    Handlers transcribe from their local copy and call `upload` to archive it;
+    `remove` deletes the local copy, waiting for any upload still reading it.
+    """
+
+    def __init__(self, storage, max_workers=2):
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='archive')
+        self._pending = {}
+        self._removing = set()
+        self._lock = threading.Lock()
+
+    def upload(self, local_path, folder, filename):
+        with self._lock:
+            future = self._executor.submit(self._upload, local_path, folder, filename)
+            self._pending.setdefault(local_path, []).append(future)
+        future.add_done_callback(lambda f: self._finished(local_path, f))
+        return future
+
+    def _upload(self, local_path, folder, filename):
+        with open(local_path, 'rb') as f:
+            stored_path = self.storage.save_file(f, folder, filename)
+        logger.info(f"Archived {local_path} to {stored_path}")
+        return stored_path
+
+    def _finished(self, local_path, future):
+        if future.exception() is not None:
+            logger.error(f"Error archiving {local_path}: {future.exception()}")
+
+        with self._lock:
+            futures = self._pending.get(local_path, [])
+            if future in futures:
+                futures.remove(future)
+            if futures or local_path not in self._removing:
+                return
+            del self._pending[local_path]
+            self._removing.discard(local_path)
+        self._delete(local_path)
+
+    def remove(self, local_path):
+        """Delete local_path now, or once its pending uploads finish"""
+        with self._lock:
+            if self._pending.get(local_path):
+                self._removing.add(local_path)
+                return
+            self._pending.pop(local_path, None)
+        self._delete(local_path)
+
+    def _delete(self, local_path):
+        try:
+            if os.path.exists(local_path):
+                logger.info(f"Deleting temp file: {local_path}")
+                os.remove(local_path)
+        except Exception as e:
+            logger.error(f"Error deleting temp file {local_path}: {e}")
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -5,9 +5,13 @@ import os
 from utils.logger import logger
 
 class FirebaseStorage:
-    def __init__(self, config):
+    def __init__(self, config, bucket=None):
         self.config = config
-        self._initialize_firebase()
+        # A bucket can be passed in (e.g. a local fake) instead of connecting to Firebase
+        if bucket is not None:
+            self.bucket = bucket
+        else:
+            self._initialize_firebase()
         
     def _initialize_firebase(self):
         try:
@@ -29,9 +33,12 @@ class FirebaseStorage:
             raise
 
     def save_file(self, file_data, folder, filename):
-        """Save file to Firebase Storage"""
+        """Save file to Firebase Storage; open files are streamed rather than read into memory"""
         blob = self.bucket.blob(f"{folder}/{filename}")
-        blob.upload_from_string(file_data)
+        if hasattr(file_data, 'read'):
+            blob.upload_from_file(file_data)
+        else:
+            blob.upload_from_string(file_data)
         blob.make_public()
         return blob.public_url
 
@@ -18,13 +18,23 @@ class LocalStorage:
                 logger.info(f"Created folder: {folder}")
 
     def save_file(self, file_data, folder, filename):
+        """Save bytes, text or an open binary file; files are copied in chunks"""
         if not os.path.exists(folder):
             os.makedirs(folder)
 
         local_path = os.path.join(folder, filename)
 
         try: 
-            if isinstance(file_data, bytes):
+            if hasattr(file_data, 'read'):
+                # Already there (e.g. audio downloaded straight into the temp folder)
+                source_name = getattr(file_data, 'name', None)
+                if isinstance(source_name, str) and os.path.exists(local_path) \
+                        and os.path.samefile(source_name, local_path):
+                    return local_path
+                with open(local_path, 'wb') as f:
+                    shutil.copyfileobj(file_data, f)
+
+            elif isinstance(file_data, bytes):
                 with open(local_path, 'wb') as f:
                     f.write(file_data)
 
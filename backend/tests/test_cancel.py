@@ -0,0 +1,90 @@
+import threading
+import time
+import numpy as np
+import pytest
+from flask import Flask
+from whisper.audio import N_SAMPLES
+from core.jobs import JobQueue
+from core.model_pool import ModelPool
+from core.progress import JobCancelled, ProgressTracker
+from core.transcription import Transcriber
+
+
+class CancellingEngine:
+    """Stands in for a model; cancels the job partway through the first window it decodes"""
+
+    name = 'fake'
+    supports_parallel = False
+    supports_batching = False
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.windows = 0
+
+    def transcribe(self, model, audio, language='en', initial_prompt=None, **options):
+        self.windows += 1
+        self.tracker.cancel()
+        return {
+            'text': ' words',
+            'segments': [{'id': 0, 'start': 0.0, 'end': len(audio) / 16000, 'text': ' words'}],
+            'language': language
+        }
+
+
+def make_transcriber(tmp_path, tracker):
+    config = {
+        'TRANSCRIPTS_FOLDER': str(tmp_path),
+        'TEMP_FOLDER': str(tmp_path),
+        'TRANSCRIPT_CACHE': 'none',
+        'VAD_ENABLED': False,
+        'TRANSCRIBE_STREAMING': True
+    }
+    transcriber = Transcriber(config, tracker)
+    transcriber.engine = CancellingEngine(tracker)
+    transcriber.model_pool = ModelPool(loaders={'fake': lambda model_size, device: object()})
+    return transcriber
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / 'recording.wav'
+    path.write_bytes(b'')
+    return str(path)
+
+
+def test_streaming_stops_at_the_next_window_after_cancel(tmp_path, audio_file):
+    tracker = ProgressTracker('job')
+    transcriber = make_transcriber(tmp_path, tracker)
+    audio = np.zeros(N_SAMPLES * 5, dtype=np.float32)
+
+    with pytest.raises(JobCancelled):
+        transcriber.transcribe_audio(audio_file, audio=audio)
+    assert transcriber.engine.windows == 1
+
+
+def test_job_cancelled_mid_transcription_reports_cancelled(tmp_path, audio_file):
+    app = Flask(__name__)
+    queue = JobQueue(app, max_workers=1)
+    tracker = ProgressTracker('job')
+    transcriber = make_transcriber(tmp_path, tracker)
+    done = threading.Event()
+
+    def handler():
+        try:
+            transcript_file, _ = transcriber.transcribe_audio(
+                audio_file, audio=np.zeros(N_SAMPLES * 5, dtype=np.float32)
+            )
+            return {'transcript_file': transcript_file}, 200
+        finally:
+            done.set()
+
+    job = queue.submit('file', handler, progress_tracker=tracker)
+    assert done.wait(10)
+    deadline = time.monotonic() + 10
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.shutdown()
+
+    assert job.status == 'cancelled'
+    assert job.error == 'Job was cancelled'
+    assert transcriber.engine.windows == 1
@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from config.settings import get_setting
+from utils.logger import logger
+
+# `ffmpeg -version` results by binary, so worker boots after the first skip running it
+VERSION_CACHE = os.path.join(tempfile.gettempdir(), 'transcript-ffmpeg-versions.json')
+
+_version_lock = threading.Lock()
+_versions = {}
+
+
+def _load_version_cache():
+    try:
+        with open(VERSION_CACHE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_version_cache(versions):
+    # Written to a temp file and renamed, so concurrent worker boots never read half a file
+    try:
+        fd, staging = tempfile.mkstemp(dir=os.path.dirname(VERSION_CACHE), suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(versions, f)
+        os.replace(staging, VERSION_CACHE)
+    except OSError as e:
+        logger.warning(f"Could not write ffmpeg version cache: {str(e)}")
+
+
+def ffmpeg_version(path):
+    """First line of `ffmpeg -version` for the binary at path, or None if it doesn't run.
+
+    Cached in memory and in VERSION_CACHE against the binary's size and
+    mtime, so a binary is only ever run once to check it.
+    """
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    with _version_lock:
+        if key in _versions:
+            return _versions[key]
+        versions = _load_version_cache()
+        if key in versions:
+            _versions[key] = versions[key]
+            return versions[key]
+
+        try:
+            result = subprocess.run(
+                [path, '-hide_banner', '-version'],
+                capture_output=True, text=True, timeout=10
+            )
+            version = result.stdout.splitlines()[0].strip() if result.returncode == 0 and result.stdout else None
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"{path} failed to run: {str(e)}")
+            version = None
+
+        _versions[key] = version
+        if version:
+            versions[key] = version
+            _save_version_cache(versions)
+        return version
+
+
+def find_ffmpeg(configured=None):
+    """Locate a working ffmpeg binary without touching the network.
+
+    Tries `configured` (FFMPEG_PATH), then whatever is on PATH, which is
+    where the Aptfile's ffmpeg package installs it on deploys. The
+    ffmpeg-*-static/ directory in the repo carries no binary, so it is not
+    searched. Returns (path, version), or (None, None) when neither runs.
+    Nothing is changed on disk: a configured binary that isn't executable
+    is ignored with a warning.
+    """
+    if configured and not (os.path.isfile(configured) and os.access(configured, os.X_OK)):
+        logger.warning(f"FFMPEG_PATH {configured} is not an executable file, ignoring it (chmod +x to use it)")
+        configured = None
+
+    candidates = [configured] if configured else []
+    on_path = shutil.which('ffmpeg')
+    if on_path:
+        candidates.append(on_path)
+
+    for candidate in candidates:
+        version = ffmpeg_version(candidate)
+        if version:
+            return candidate, version
+        logger.warning(f"Skipping ffmpeg at {candidate}: it did not run")
+    return None, None
+
+
+def setup_ffmpeg(config=None):
+    """Find ffmpeg and put its directory first on PATH for whisper, yt-dlp and decode_audio.
+
+    Safe to call more than once; returns the binary's path, or None (logged
+    as an error) when no ffmpeg is available.
+    """
+    path, version = find_ffmpeg(get_setting(config, 'FFMPEG_PATH', None))
+    if path is None:
+        logger.error("No working ffmpeg found; set FFMPEG_PATH or install ffmpeg (see Aptfile)")
+        return None
+
+    on_path = shutil.which('ffmpeg')
+    if not on_path or os.path.realpath(on_path) != os.path.realpath(path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.environ['PATH'] = os.pathsep.join([directory, os.environ.get('PATH', '')])
+    logger.info(f"Using {version} at {path}")
+    return path
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import {
     Container,
     Box,
@@ -33,7 +33,10 @@ function App() {
     });
     const [timeStamps, setTimeStamps] = useState(false);
     const [transcript, setTranscript] = useState(null);
+    const [jobId, setJobId] = useState(null);
     const [error, setError] = useState('');
+    // Aborts the in-flight submit/poll of the current job when it is cancelled
+    const jobController = useRef(null);
 
     // Handle source type change
     const handleSourceChange = (e) => {
@@ -69,10 +72,13 @@ function App() {
     }
 
     const handleSubmit = async () => {
+        const controller = new AbortController();
+        jobController.current = controller;
         try {
             setError('')
             setIsProcessing(true)
             setTranscript(null)
+            setJobId(null)
             setProgress({
                 status: 'idle',
                 message: '',
@@ -85,9 +91,14 @@ function App() {
                 const formData = new FormData();
                 formData.append('type', sourceType)
                 files.forEach(file => formData.append('files[]', file));
-                response = await transcriptionService.processMedia(sourceType, formData);
+                response = await transcriptionService.processMedia(sourceType, formData, setJobId, {}, controller.signal);
             } else {
-                response = await transcriptionService.processMedia(sourceType, url);
+                response = await transcriptionService.processMedia(sourceType, url, setJobId, {}, controller.signal);
+            }
+
+            // Cancelled while the last poll was in flight
+            if (controller.signal.aborted) {
+                return;
             }
 
             console.log('Response from server:', response);
@@ -114,6 +125,10 @@ function App() {
                 setFiles([]);
             }
         } catch (err) {
+            // The user cancelled; handleCancel has already reset the form
+            if (controller.signal.aborted) {
+                return;
+            }
             console.error('Error in submission:', err);
             setError(err.message || 'An error occurred');
             setIsProcessing(false);
@@ -121,8 +136,12 @@ function App() {
     }
 
     const handleCancel = async () => {
+        // Stop polling and close the progress stream before anything late can land
+        jobController.current?.abort();
+        setIsProcessing(false);
         try {
-            await transcriptionService.cancelTransCript();
+            await transcriptionService.cancelTransCript(jobId);
+            setJobId(null)
             setSourceType('')
             setUrl('');
             setFiles([])
@@ -141,41 +160,32 @@ function App() {
     }
 
     useEffect(() => {
-        let interval;
-
-        const checkProgress = async () => {
-            try {
-                const progressData = await transcriptionService.getProgress();
-                setProgress(progressData);
+        if (!isProcessing || !jobId) {
+            return;
+        }
 
-                if (progressData.status === 'complete' || progressData.status === 'error') {
-                    // console.log("Stopping polling - status:", progressData.status);
+        // The server only sends new segments, so append them to what we have
+        const closeStream = transcriptionService.streamProgress(
+            jobId,
+            ({ segments, segment_offset, cursor, ...status }) => {
+                setProgress(prev => ({
+                    ...prev,
+                    ...status,
+                    segments: [...(prev.segments || []).slice(0, segment_offset), ...segments]
+                }));
+
+                if (['complete', 'error', 'cancelled'].includes(status.status)) {
                     setIsProcessing(false);
-                    clearInterval(interval);
-                } else if (progressData.status === 'error') {
-                    clearInterval(interval);
-                    setIsProcessing(false);
-                    setError('Transcription failed');
-                } 
-            } catch (err) {
-                setError(err.message || 'Error checking progress');
+                }
+            },
+            () => {
+                setError('Lost connection to progress updates');
                 setIsProcessing(false);
-                clearInterval(interval);
             }
-        }
+        );
 
-        if (isProcessing) {
-            checkProgress(); // Initial check
-            interval = setInterval(checkProgress, 2000); // Poll every 2 seconds
-        }
-
-        return () => {
-            if (interval) {
-                // console.log("Cleanup: clearing polling interval");
-                clearInterval(interval);
-            }
-        };
-    }, [isProcessing]);
+        return closeStream;
+    }, [isProcessing, jobId]);
 
     const handleDownload = async (filename) => {
         if (!filename) {
@@ -12,64 +12,109 @@ const api = axios.create({
     // }
 });
 
+// /process queues a job and returns its id; poll the job until it finishes.
+// A failed poll is retried here rather than by resubmitting the job, so a
+// hiccup never starts a second transcription of the same media. Aborting
+// `signal` stops the polling; the returned promise then rejects.
+const waitForJob = async (jobId, signal, interval = 2000, maxPollFailures = 5) => {
+    let pollFailures = 0;
+
+    while (true) {
+        signal?.throwIfAborted();
+        let job;
+        try {
+            const response = await api.get(`/jobs/${jobId}`, { signal });
+            job = response.data;
+            pollFailures = 0;
+        } catch (error) {
+            if (signal?.aborted) {
+                throw error;
+            }
+            pollFailures++;
+            // 404 means the server forgot the job; waiting won't bring it back
+            if (error.response?.status === 404 || pollFailures >= maxPollFailures) {
+                throw new Error(error.response?.data?.error || 'Lost track of the transcription job');
+            }
+            console.log(`Polling job failed, retrying... (${pollFailures}/${maxPollFailures})`);
+            await new Promise(resolve => setTimeout(resolve, interval * pollFailures));
+            continue;
+        }
+
+        if (job.status === 'complete') {
+            return job.result;
+        }
+        if (job.status === 'error' || job.status === 'cancelled') {
+            throw new Error(job.error || `Transcription ${job.status}`);
+        }
+
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+};
+
+// Transcription options ride along as form fields; set() so retries don't duplicate them
+const appendOptions = (formData, options) => {
+    Object.entries(options || {}).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') {
+            formData.set(key, value);
+        }
+    });
+};
+
 export const transcriptionService = {
-    processMedia: async (type, data) => {
+    // options: { model, language, beam_size, temperature, condition_on_previous_text }
+    // signal: an AbortSignal that stops submitting/polling, e.g. when the user cancels
+    processMedia: async (type, data, onJobQueued, options = {}, signal = undefined) => {
         if (!['video', 'playlist', 'file'].includes(type)) {
             throw new Error('Invalid media type')
         }
-    
+
+        let formData = data;
+        if (!(type === 'file' && data instanceof FormData)) {
+            formData = new FormData();
+            formData.append('type', type);
+            formData.append('source', data);
+        }
+        appendOptions(formData, options);
+
+        // Only submitting the job is retried; once it is queued we just poll it
         const maxRetries = 3;
-        let retryCount = 0;
-        let lastError = null;
-    
-        while (retryCount < maxRetries) {
+        let jobId = null;
+
+        for (let attempt = 1; jobId === null; attempt++) {
+            signal?.throwIfAborted();
             try {
-                if (type === 'file' && data instanceof FormData) {
-                    console.log('Attempting upload, try #', retryCount + 1);
-                    
-                    const response = await api.post('/process', data, {
-                        headers: {
-                            'Content-Type': 'multipart/form-data'
-                        },
-                    });
-                    return response.data;
-                }
-    
-                const formData = new FormData();
-                formData.append('type', type);
-                formData.append('source', data);
-    
+                console.log('Submitting job, try #', attempt);
                 const response = await api.post('/process', formData, {
                     headers: {
                         'Content-Type': 'multipart/form-data'
                     },
-                    timeout: 300000
+                    ...(type === 'file' ? {} : { timeout: 300000 }),
+                    signal
                 });
-                return response.data;
+                jobId = response.data.job_id;
             } catch (error) {
-                lastError = error;
-                retryCount++;
-                
                 // Only retry on network errors or 502 errors
-                if (!error.response || error.response.status === 502) {
-                    console.log(`Upload failed, retrying... (${retryCount}/${maxRetries})`);
-                    // Wait before retrying (exponential backoff)
-                    await new Promise(resolve => setTimeout(resolve, 2000 * retryCount));
-                    continue;
+                if (signal?.aborted) {
+                    throw error;
+                }
+                const retryable = !error.response || error.response.status === 502;
+                if (!retryable || attempt >= maxRetries) {
+                    console.log('Error details:', error.response?.data);
+                    throw new Error(error.response?.data?.error || error.message);
                 }
-                
-                // Don't retry other types of errors
-                break;
+                console.log(`Upload failed, retrying... (${attempt}/${maxRetries})`);
+                // Wait before retrying (exponential backoff)
+                await new Promise(resolve => setTimeout(resolve, 2000 * attempt));
             }
         }
-    
-        console.log('Error details:', lastError.response?.data);
-        throw lastError.response?.data || lastError.message;
+
+        onJobQueued?.(jobId);
+        return await waitForJob(jobId, signal);
     },
 
-    getProgress: async () => {
+    getProgress: async (jobId) => {
         try {
-            const response = await api.get('/progress');
+            const response = await api.get(jobId ? `/progress/${jobId}` : '/progress');
             const data = response.data
 
             if(data.satus === 'complete' || data.progress === 100) {
@@ -82,6 +127,68 @@ export const transcriptionService = {
         }
     },
 
+    // Subscribe to a job's progress over Server-Sent Events. Each event only
+    // carries segments we haven't seen yet; EventSource resumes from the last
+    // event id on reconnect. When the server refuses the stream (it caps how
+    // many are open at once) this falls back to polling /progress/<id>.
+    // Returns a function that stops the updates.
+    streamProgress: (jobId, onProgress, onError, interval = 2000, maxPollFailures = 5) => {
+        const finished = (status) => ['complete', 'error', 'cancelled'].includes(status);
+        let timer = null;
+        let stopped = false;
+        let pollFailures = 0;
+
+        const poll = async () => {
+            try {
+                const { segments, ...status } = await transcriptionService.getProgress(jobId);
+                if (stopped) {
+                    return;
+                }
+                pollFailures = 0;
+                onProgress({ ...status, segments: segments || [], segment_offset: 0 });
+                if (finished(status.status)) {
+                    return;
+                }
+            } catch (error) {
+                pollFailures++;
+                if (pollFailures >= maxPollFailures) {
+                    onError?.(error);
+                    return;
+                }
+                console.log(`Polling progress failed, retrying... (${pollFailures}/${maxPollFailures})`);
+            }
+            if (!stopped) {
+                timer = setTimeout(poll, interval);
+            }
+        };
+
+        const source = new EventSource(`${API_URL}/progress/${jobId}/stream`, {
+            withCredentials: true
+        });
+
+        source.addEventListener('progress', (event) => {
+            const delta = JSON.parse(event.data);
+            onProgress(delta);
+
+            if (finished(delta.status)) {
+                source.close();
+            }
+        });
+        source.onerror = (event) => {
+            // EventSource reconnects by itself unless the server closed it for good
+            if (source.readyState === EventSource.CLOSED && !stopped) {
+                console.log('Progress stream unavailable, polling instead', event);
+                poll();
+            }
+        };
+
+        return () => {
+            stopped = true;
+            clearTimeout(timer);
+            source.close();
+        };
+    },
+
     downloadTranscript: async (filename) => {
         try {
             console.log("Downloading file:", filename);
@@ -102,9 +209,9 @@ export const transcriptionService = {
         }
     },
 
-    cancelTransCript: async () => {
+    cancelTransCript: async (jobId) => {
         try {
-            const response = await api.post('/cancel')
+            const response = await api.post('/cancel', { job_id: jobId })
             return response.data;
         } catch (error) {
             throw error.response?.data || error.message